@@ -0,0 +1,87 @@
+"""
+Cache module for PDF Editor
+Optional Redis read-through cache in front of the database for PDF metadata
+Caching is disabled (every lookup is a miss) when REDIS_URL is not set
+"""
+import os
+import orjson
+import logging
+from typing import Any, Optional
+import redis.asyncio as redis
+logger = logging.getLogger("pdf_editor.cache")
+# Cache configuration from environment variables
+REDIS_URL = os.getenv('REDIS_URL', '')
+PDF_META_TTL = int(os.getenv('CACHE_PDF_META_TTL', '300'))
+PDF_LIST_TTL = int(os.getenv('CACHE_PDF_LIST_TTL', '30'))
+PDF_LIST_KEY = "pdfs:list"
+# Seconds to wait for a TCP connection so an unreachable Redis can't stall requests
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '1'))
+# Generation counters outlive any metadata entry cached under an older generation
+PDF_GENERATION_TTL = max(24 * 3600, 10 * PDF_META_TTL)
+# Redis client (None when caching is disabled)
+redis_client: Optional[redis.Redis] = None
+def pdf_generation_key(pdf_id: str) -> str:
+    """Cache key for a PDF's metadata generation, bumped by every write"""
+    return f"pdf:gen:{pdf_id}"
+async def pdf_meta_key(pdf_id: str) -> str:
+    """
+    Cache key for a PDF's metadata and fields (never the raw bytes) at its current generation
+    A read that raced a write caches under the old generation, which nobody reads anymore
+    """
+    generation = await cache_get(pdf_generation_key(pdf_id)) or 0
+    return f"pdf:meta:{pdf_id}:{generation}"
+async def init_cache():
+    """Create the Redis client if REDIS_URL is configured and the server answers a ping"""
+    global redis_client
+    if not REDIS_URL:
+        logger.info("REDIS_URL not set - metadata cache disabled")
+        return False
+    client = redis.from_url(REDIS_URL, socket_connect_timeout=REDIS_CONNECT_TIMEOUT)
+    try:
+        await client.ping()
+    except redis.RedisError as e:
+        logger.error(f"Redis unreachable at startup - metadata cache disabled: {e}")
+        await client.aclose()
+        return False
+    redis_client = client
+    logger.info("Metadata cache enabled")
+    return True
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Return the cached JSON value for key, or None on miss/error"""
+    if redis_client is None:
+        return None
+    try:
+        data = await redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning(f"Cache read failed for {key}: {e}")
+        return None
+    return orjson.loads(data) if data is not None else None
+async def cache_set(key: str, value: Any, ttl: int):
+    """Store a JSON-serializable value under key with a TTL in seconds"""
+    if redis_client is None:
+        return
+    try:
+        await redis_client.set(key, orjson.dumps(value), ex=ttl)
+    except redis.RedisError as e:
+        logger.warning(f"Cache write failed for {key}: {e}")
+async def cache_delete(*keys: str):
+    """Invalidate one or more cache keys"""
+    if redis_client is None or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for {keys}: {e}")
+async def invalidate_pdf(pdf_id: str):
+    """Move a PDF to a new metadata generation and drop the PDF list (field counts change)"""
+    if redis_client is None:
+        return
+    generation_key = pdf_generation_key(pdf_id)
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.incr(generation_key).expire(generation_key, PDF_GENERATION_TTL).delete(PDF_LIST_KEY)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Cache invalidation failed for {pdf_id}: {e}")
@@ -3,12 +3,16 @@ Database module for PDF Editor
 Supports MySQL/MariaDB with connection pooling and migrations
 """
 import os
-import json
+import orjson
+import time
 from typing import List, Dict, Any, Optional
 from contextlib import contextmanager
+from itertools import chain
+from weakref import WeakKeyDictionary
 import mysql.connector
 from mysql.connector import Error
-from mysql.connector.pooling import MySQLConnectionPool
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool, PooledMySQLConnection
 from pathlib import Path
 # Database configuration from environment variables
 DB_CONFIG = {
@@ -17,7 +21,16 @@ DB_CONFIG = {
     'user': os.getenv('DB_USER', 'pdf_editor'),
     'password': os.getenv('DB_PASSWORD', 'pdf_editor_password'),
     'database': os.getenv('DB_NAME', 'pdf_editor'),
+    'autocommit': False,
+    'connection_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+    'use_pure': False,  # Use the C extension for faster row (un)marshalling
 }
+# Retries when every pooled connection is checked out (exponential backoff)
+POOL_ACQUIRE_RETRIES = 5
+POOL_ACQUIRE_BACKOFF = 0.01
+# Named lock held while applying migrations (seconds to wait for another worker)
+MIGRATION_LOCK_NAME = 'pdf_editor_migrations'
+MIGRATION_LOCK_TIMEOUT = int(os.getenv('DB_MIGRATION_LOCK_TIMEOUT', '60'))
 # Connection pool
 connection_pool: Optional[MySQLConnectionPool] = None
 def init_connection_pool():
@@ -26,8 +39,10 @@ def init_connection_pool():
     try:
         connection_pool = MySQLConnectionPool(
             pool_name="pdf_editor_pool",
-            pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
-            pool_reset_session=True,
+            # Per worker process: workers x DB_POOL_SIZE must stay below MySQL max_connections (151 by default)
+            pool_size=int(os.getenv('DB_POOL_SIZE', '8')),
+            # Sessions are cleaned up by get_db_connection, skip the reset round-trip on release
+            pool_reset_session=False,
             **DB_CONFIG
         )
         print(f"✅ Database connection pool initialized: {DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}")
@@ -41,14 +56,89 @@ def get_db_connection():
     """Get a database connection from the pool"""
     connection = None
     try:
-        connection = connection_pool.get_connection()
+        for attempt in range(POOL_ACQUIRE_RETRIES + 1):
+            try:
+                connection = connection_pool.get_connection()
+                break
+            except PoolError:
+                if attempt == POOL_ACQUIRE_RETRIES:
+                    raise
+                time.sleep(POOL_ACQUIRE_BACKOFF * 2 ** attempt)
         yield connection
     except Error as e:
         print(f"❌ Database connection error: {e}")
         raise
     finally:
         if connection and connection.is_connected():
+            # Roll back partial writes from a failed transaction and end any implicit
+            # read transaction so the next user doesn't see a stale snapshot
+            if connection.in_transaction:
+                connection.rollback()
             connection.close()
+def _apply_pending_migrations(conn, cursor):
+    """Apply migration files not yet recorded in the migrations table (caller holds the lock)"""
+    # Create migrations tracking table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS migrations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            migration_name VARCHAR(255) UNIQUE NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    conn.commit()
+    # Get list of applied migrations
+    cursor.execute("SELECT migration_name FROM migrations ORDER BY id")
+    applied_migrations = {row['migration_name'] for row in cursor.fetchall()}
+    # Find migration files
+    migrations_dir = Path(__file__).parent / 'migrations'
+    if not migrations_dir.exists():
+        print("⚠️  No migrations directory found")
+        return
+    migration_files = sorted(migrations_dir.glob('*.sql'))
+    if not migration_files:
+        print("⚠️  No migration files found")
+        return
+    # Run pending migrations
+    for migration_file in migration_files:
+        migration_name = migration_file.name
+        if migration_name in applied_migrations:
+            continue
+        print(f"🔄 Running migration: {migration_name}")
+        # Read and execute migration
+        with open(migration_file, 'r') as f:
+            sql_content = f.read()
+        # Let the server split the file (safe for ';' inside literals) and
+        # drain every result so the connection is ready for the next statement
+        for result in cursor.execute(sql_content, multi=True):
+            if result.with_rows:
+                result.fetchall()
+        # Record migration as applied
+        cursor.execute(
+            "INSERT INTO migrations (migration_name) VALUES (%s)",
+            (migration_name,)
+        )
+        conn.commit()
+        print(f"✅ Migration applied: {migration_name}")
+    print("✅ All migrations completed")
+def _release_migration_lock(conn, cursor):
+    """
+    Release the migration lock (named locks belong to the session and pooled connections are reused)
+    A failed multi-statement migration can leave unread results on the connection, so they are
+    drained and the release runs on a fresh cursor; a failing release is only reported, so it
+    never masks the migration error
+    """
+    try:
+        try:
+            cursor.close()
+        except Error:
+            pass
+        conn.consume_results()
+        release_cursor = conn.cursor()
+        release_cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK_NAME,))
+        release_cursor.fetchall()
+        release_cursor.close()
+    except Error as e:
+        print(f"⚠️  Could not release migration lock '{MIGRATION_LOCK_NAME}': {e}")
 def run_migrations():
     """
     Run all pending database migrations
@@ -57,179 +147,243 @@ def run_migrations():
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor(dictionary=True)
-            # Create migrations tracking table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS migrations (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    migration_name VARCHAR(255) UNIQUE NOT NULL,
-                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-            conn.commit()
-            # Get list of applied migrations
-            cursor.execute("SELECT migration_name FROM migrations ORDER BY id")
-            applied_migrations = {row['migration_name'] for row in cursor.fetchall()}
-            # Find migration files
-            migrations_dir = Path(__file__).parent / 'migrations'
-            if not migrations_dir.exists():
-                print("⚠️  No migrations directory found")
-                return
-            migration_files = sorted(migrations_dir.glob('*.sql'))
-            if not migration_files:
-                print("⚠️  No migration files found")
-                return
-            # Run pending migrations
-            for migration_file in migration_files:
-                migration_name = migration_file.name
-                if migration_name in applied_migrations:
-                    continue
-                print(f"🔄 Running migration: {migration_name}")
-                # Read and execute migration
-                with open(migration_file, 'r') as f:
-                    sql_content = f.read()
-                # Split by semicolons and execute each statement
-                statements = [s.strip() for s in sql_content.split(';') if s.strip()]
-                for statement in statements:
-                    if statement:
-                        cursor.execute(statement)
-                # Record migration as applied
-                cursor.execute(
-                    "INSERT INTO migrations (migration_name) VALUES (%s)",
-                    (migration_name,)
-                )
-                conn.commit()
-                print(f"✅ Migration applied: {migration_name}")
-            print("✅ All migrations completed")
+            # Every uvicorn worker runs this on startup - serialize them so each
+            # migration is applied exactly once
+            cursor.execute("SELECT GET_LOCK(%s, %s) AS acquired", (MIGRATION_LOCK_NAME, MIGRATION_LOCK_TIMEOUT))
+            if cursor.fetchone()['acquired'] != 1:
+                raise Error(msg=f"Timed out waiting for migration lock '{MIGRATION_LOCK_NAME}'")
+            try:
+                _apply_pending_migrations(conn, cursor)
+            finally:
+                _release_migration_lock(conn, cursor)
     except Error as e:
         print(f"❌ Error running migrations: {e}")
         raise
 # PDF CRUD Operations
-def db_save_pdf(pdf_id: str, filename: str, num_pages: int, raw_data: bytes, fields: List[Dict[str, Any]]) -> bool:
-    """Save PDF and its fields to database"""
+# Columns written for each field row, in the order produced by _field_row()
+FIELD_INSERT_COLUMNS = (
+    "pdf_id, field_id, field_name, label, original_name, field_type, value, "
+    "checked, radio_group, date_format, monospace, "
+    "x, y, width, height, page, "
+    "border_style, border_width, border_color, "
+    "font_family, font_size, max_length"
+)
+FIELD_ROW_PLACEHOLDER = "(" + ", ".join(["%s"] * 22) + ")"
+# Maximum rows per multi-row INSERT, keeps each statement well under max_allowed_packet
+FIELD_INSERT_BATCH_SIZE = int(os.getenv('DB_INSERT_BATCH_SIZE', '500'))
+def _field_row(pdf_id: str, field: Dict[str, Any]) -> tuple:
+    """Build the INSERT parameter tuple for a field (matches FIELD_INSERT_COLUMNS)"""
+    return (
+        pdf_id,
+        field.get('id'),
+        field.get('name'),
+        field.get('label'),
+        field.get('original_name'),
+        field.get('field_type'),
+        field.get('value'),
+        field.get('checked', False),
+        field.get('radio_group'),
+        field.get('date_format'),
+        field.get('monospace', False),
+        field.get('x'),
+        field.get('y'),
+        field.get('width'),
+        field.get('height'),
+        field.get('page'),
+        field.get('border_style'),
+        field.get('border_width'),
+        orjson.dumps(field.get('border_color')).decode() if field.get('border_color') else None,
+        field.get('font_family'),
+        field.get('font_size'),
+        field.get('max_length')
+    )
+def db_save_pdf(pdf_id: str, filename: str, num_pages: int, raw_data: Optional[bytes], fields: List[Dict[str, Any]],
+                storage_key: Optional[str] = None) -> bool:
+    """Save PDF and its fields to database (raw_data is None when the bytes live in object storage)"""
     try:
         with get_db_connection() as conn:
+            conn.start_transaction(isolation_level='READ COMMITTED')
             cursor = conn.cursor()
-            # Insert PDF
-            cursor.execute("""
-                INSERT INTO pdfs (id, filename, num_pages, raw_data)
-                VALUES (%s, %s, %s, %s)
-            """, (pdf_id, filename, num_pages, raw_data))
-            # Insert fields
-            for field in fields:
-                cursor.execute("""
-                    INSERT INTO fields (
-                        pdf_id, field_id, field_name, label, original_name, field_type, value,
-                        checked, radio_group, date_format, monospace,
-                        x, y, width, height, page,
-                        border_style, border_width, border_color,
-                        font_family, font_size, max_length
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    pdf_id,
-                    field.get('id'),
-                    field.get('name'),
-                    field.get('label'),
-                    field.get('original_name'),
-                    field.get('field_type'),
-                    field.get('value'),
-                    field.get('checked', False),
-                    field.get('radio_group'),
-                    field.get('date_format'),
-                    field.get('monospace', False),
-                    field.get('x'),
-                    field.get('y'),
-                    field.get('width'),
-                    field.get('height'),
-                    field.get('page'),
-                    field.get('border_style'),
-                    field.get('border_width'),
-                    json.dumps(field.get('border_color')) if field.get('border_color') else None,
-                    field.get('font_family'),
-                    field.get('font_size'),
-                    field.get('max_length')
+            # Build one multi-row INSERT per batch of fields instead of one per field
+            batches = []
+            for start in range(0, len(fields), FIELD_INSERT_BATCH_SIZE):
+                batch = fields[start:start + FIELD_INSERT_BATCH_SIZE]
+                batches.append((
+                    f"INSERT INTO fields ({FIELD_INSERT_COLUMNS}) VALUES "
+                    + ", ".join([FIELD_ROW_PLACEHOLDER] * len(batch)),
+                    list(chain.from_iterable(_field_row(pdf_id, field) for field in batch))
                 ))
+            # Insert PDF, pipelined with the first batch of fields in a single round-trip
+            sql = """
+                INSERT INTO pdfs (id, filename, num_pages, num_fields, raw_data, storage_key)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """
+            params = [pdf_id, filename, num_pages, len(fields), raw_data, storage_key]
+            if batches:
+                batch_sql, batch_params = batches.pop(0)
+                sql = f"{sql}; {batch_sql}"
+                params.extend(batch_params)
+            # multi=True is gone in mysql-connector 9.x (pinned below 9 in requirements.txt)
+            for _ in cursor.execute(sql, params, multi=True):
+                pass
+            # Remaining batches go separately to keep each packet under max_allowed_packet
+            for batch_sql, batch_params in batches:
+                cursor.execute(batch_sql, batch_params)
             conn.commit()
             print(f"✅ Saved PDF {pdf_id} with {len(fields)} fields")
             return True
     except Error as e:
         print(f"❌ Error saving PDF: {e}")
         return False
+# Point lookups run through server-side prepared statements (see _prepared_cursor)
+GET_PDF_SQL = """
+    SELECT id, filename, num_pages, raw_data, storage_key, created_at, updated_at
+    FROM pdfs WHERE id = %s
+"""
+GET_PDF_META_SQL = """
+    SELECT id, filename, num_pages, created_at, updated_at
+    FROM pdfs WHERE id = %s
+"""
+GET_PDF_CONTENT_SQL = "SELECT raw_data, storage_key FROM pdfs WHERE id = %s"
+GET_PDF_FIELDS_SQL = """
+    SELECT field_id, field_name, label, original_name, field_type, value,
+           checked, radio_group, date_format, monospace,
+           x, y, width, height, page,
+           border_style, border_width, border_color,
+           font_family, font_size, max_length
+    FROM fields WHERE pdf_id = %s
+    ORDER BY id
+"""
+# API keys for the GET_PDF_FIELDS_SQL columns, in SELECT order
+FIELD_OUTPUT_KEYS = (
+    'id', 'name', 'label', 'original_name', 'field_type', 'value',
+    'checked', 'radio_group', 'date_format', 'monospace',
+    'x', 'y', 'width', 'height', 'page',
+    'border_style', 'border_width', 'border_color',
+    'font_family', 'font_size', 'max_length',
+)
+# Prepared cursors per physical connection as (connection_id, {name: cursor}); cursors
+# only hold a weak proxy to their connection, so entries go away with the connection
+_prepared_cursors: WeakKeyDictionary = WeakKeyDictionary()
+def _physical_connection(conn):
+    """The connection behind a pooled checkout (the wrapper is new on every checkout)"""
+    if isinstance(conn, PooledMySQLConnection):
+        cnx = conn._cnx
+        assert cnx is not None, "pooled connection used after being returned to the pool"
+        return cnx
+    return conn
+def _prepared_cursor(conn, name: str):
+    """
+    Get a prepared cursor cached for the underlying pooled connection
+    Re-executing the same SQL on it reuses the server-side statement, so the
+    statement is parsed and planned once per connection instead of per request
+    """
+    cnx = _physical_connection(conn)
+    # Keyed on the server connection id: after a pool reconnect (idle timeout,
+    # server restart) the old statement handles are gone, so start over
+    connection_id = cnx.connection_id
+    cached = _prepared_cursors.get(cnx)
+    if cached is None or cached[0] != connection_id:
+        cached = (connection_id, {})
+        _prepared_cursors[cnx] = cached
+    cursors = cached[1]
+    cursor = cursors.get(name)
+    if cursor is None:
+        cursor = conn.cursor(prepared=True)
+        cursors[name] = cursor
+    return cursor
+def _drop_prepared_cursors(conn):
+    """Forget cached prepared cursors after an error (the statements may be gone)"""
+    _prepared_cursors.pop(_physical_connection(conn), None)
+def _fetch_prepared(conn, name: str, sql: str, params: tuple):
+    """
+    Run a cached prepared statement and return (column_names, rows)
+    A failure is retried once on fresh cursors (reconnecting first if needed), so a
+    stale statement handle doesn't turn an existing row into a "not found"
+    """
+    for attempt in range(2):
+        try:
+            cursor = _prepared_cursor(conn, name)
+            cursor.execute(sql, params)
+            return cursor.column_names, cursor.fetchall()
+        except Error:
+            _drop_prepared_cursors(conn)
+            if attempt:
+                raise
+            if not conn.is_connected():
+                conn.reconnect()
+def _load_pdf(pdf_id: str, include_blob: bool) -> Optional[Dict[str, Any]]:
+    """Load a PDF row and its fields, with or without the raw_data blob"""
+    with get_db_connection() as conn:
+        # Get PDF
+        if include_blob:
+            column_names, rows = _fetch_prepared(conn, 'get_pdf', GET_PDF_SQL, (pdf_id,))
+        else:
+            column_names, rows = _fetch_prepared(conn, 'get_pdf_meta', GET_PDF_META_SQL, (pdf_id,))
+        if not rows:
+            return None
+        pdf = dict(zip(column_names, rows[0]))
+        # Get fields, mapping each row tuple straight onto the API keys
+        _, rows = _fetch_prepared(conn, 'get_pdf_fields', GET_PDF_FIELDS_SQL, (pdf_id,))
+        formatted_fields = [dict(zip(FIELD_OUTPUT_KEYS, row)) for row in rows]
+        # border_color is stored as JSON and only returned when set
+        for field in formatted_fields:
+            border_color = field.pop('border_color')
+            if border_color:
+                field['border_color'] = orjson.loads(border_color)
+        result = {
+            'pdf_id': pdf['id'],
+            'filename': pdf['filename'],
+            'num_pages': pdf['num_pages'],
+            'fields': formatted_fields,
+            'created_at': pdf['created_at'],
+            'updated_at': pdf['updated_at']
+        }
+        if include_blob:
+            result['raw_data'] = pdf['raw_data']
+            result['storage_key'] = pdf['storage_key']
+        return result
 def db_get_pdf(pdf_id: str) -> Optional[Dict[str, Any]]:
-    """Get PDF and its fields from database"""
+    """Get PDF, its raw data and its fields from database"""
+    try:
+        return _load_pdf(pdf_id, include_blob=True)
+    except Error as e:
+        print(f"❌ Error getting PDF {pdf_id}: {e}")
+        return None
+def db_get_pdf_meta(pdf_id: str) -> Optional[Dict[str, Any]]:
+    """Get PDF metadata and its fields without the raw_data blob"""
+    try:
+        return _load_pdf(pdf_id, include_blob=False)
+    except Error as e:
+        print(f"❌ Error getting PDF metadata {pdf_id}: {e}")
+        return None
+def db_get_pdf_content(pdf_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get only where the PDF bytes are: raw_data from the database,
+    or the storage_key of the object in object storage
+    """
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            # Get PDF
-            cursor.execute("""
-                SELECT id, filename, num_pages, raw_data, created_at, updated_at
-                FROM pdfs WHERE id = %s
-            """, (pdf_id,))
-            pdf = cursor.fetchone()
-            if not pdf:
+            _, rows = _fetch_prepared(conn, 'get_pdf_content', GET_PDF_CONTENT_SQL, (pdf_id,))
+            if not rows:
                 return None
-            # Get fields
-            cursor.execute("""
-                SELECT field_id, field_name, label, original_name, field_type, value,
-                       checked, radio_group, date_format, monospace,
-                       x, y, width, height, page,
-                       border_style, border_width, border_color,
-                       font_family, font_size, max_length
-                FROM fields WHERE pdf_id = %s
-                ORDER BY id
-            """, (pdf_id,))
-            fields = cursor.fetchall()
-            # Convert fields to proper format
-            formatted_fields = []
-            for field in fields:
-                formatted_field = {
-                    'id': field['field_id'],
-                    'name': field['field_name'],
-                    'label': field['label'],
-                    'original_name': field['original_name'],
-                    'field_type': field['field_type'],
-                    'value': field['value'],
-                    'checked': field['checked'],
-                    'radio_group': field['radio_group'],
-                    'date_format': field['date_format'],
-                    'monospace': field['monospace'],
-                    'x': field['x'],
-                    'y': field['y'],
-                    'width': field['width'],
-                    'height': field['height'],
-                    'page': field['page'],
-                    'border_style': field['border_style'],
-                    'border_width': field['border_width'],
-                    'font_family': field['font_family'],
-                    'font_size': field['font_size'],
-                    'max_length': field['max_length'],
-                }
-                if field['border_color']:
-                    formatted_field['border_color'] = json.loads(field['border_color'])
-                formatted_fields.append(formatted_field)
+            raw_data, storage_key = rows[0]
             return {
-                'pdf_id': pdf['id'],
-                'filename': pdf['filename'],
-                'num_pages': pdf['num_pages'],
-                'raw_data': pdf['raw_data'],
-                'fields': formatted_fields,
-                'created_at': pdf['created_at'],
-                'updated_at': pdf['updated_at']
+                'raw_data': bytes(raw_data) if raw_data is not None else None,
+                'storage_key': storage_key
             }
     except Error as e:
-        print(f"❌ Error getting PDF {pdf_id}: {e}")
+        print(f"❌ Error getting PDF content {pdf_id}: {e}")
         return None
-def db_list_pdfs() -> List[Dict[str, Any]]:
-    """List all PDFs (without raw data)"""
+def db_list_pdfs() -> Optional[List[Dict[str, Any]]]:
+    """List all PDFs (without raw data), or None when the database could not be read"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor(dictionary=True)
             cursor.execute("""
-                SELECT p.id, p.filename, p.num_pages, p.created_at,
-                       COUNT(f.id) as num_fields
-                FROM pdfs p
-                LEFT JOIN fields f ON p.id = f.pdf_id
-                GROUP BY p.id, p.filename, p.num_pages, p.created_at
-                ORDER BY p.created_at DESC
+                SELECT id, filename, num_pages, num_fields, created_at
+                FROM pdfs
+                ORDER BY created_at DESC
             """)
             pdfs = cursor.fetchall()
             return [
@@ -244,68 +398,44 @@ def db_list_pdfs() -> List[Dict[str, Any]]:
             ]
     except Error as e:
         print(f"❌ Error listing PDFs: {e}")
-        return []
+        return None
+def _refresh_field_count(cursor, pdf_id: str):
+    """Recompute pdfs.num_fields after fields were added or removed (same transaction)"""
+    cursor.execute("""
+        UPDATE pdfs SET num_fields = (SELECT COUNT(*) FROM fields WHERE pdf_id = %s)
+        WHERE id = %s
+    """, (pdf_id, pdf_id))
+# Single-statement upsert relying on the uq_fields_pdf_field_id unique key
+UPSERT_FIELD_SQL = f"""
+    INSERT INTO fields ({FIELD_INSERT_COLUMNS}) VALUES {FIELD_ROW_PLACEHOLDER}
+    ON DUPLICATE KEY UPDATE
+        field_name = VALUES(field_name), label = VALUES(label), original_name = VALUES(original_name),
+        field_type = VALUES(field_type), value = VALUES(value), checked = VALUES(checked),
+        radio_group = VALUES(radio_group), date_format = VALUES(date_format), monospace = VALUES(monospace),
+        x = VALUES(x), y = VALUES(y), width = VALUES(width), height = VALUES(height), page = VALUES(page),
+        border_style = VALUES(border_style), border_width = VALUES(border_width), border_color = VALUES(border_color),
+        font_family = VALUES(font_family), font_size = VALUES(font_size), max_length = VALUES(max_length)
+"""
+# Id of the field a name-only save refers to (idx_fields_pdf_lookup covers it)
+FIELD_ID_BY_NAME_SQL = """
+    SELECT field_id FROM fields WHERE pdf_id = %s AND field_name = %s
+    ORDER BY id LIMIT 1
+"""
 def db_update_field(pdf_id: str, field_data: Dict[str, Any]) -> bool:
     """Update or insert a field"""
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            # Check if field exists
-            field_identifier = field_data.get('id') or field_data.get('name')
-            cursor.execute("""
-                SELECT id FROM fields 
-                WHERE pdf_id = %s AND (field_id = %s OR field_name = %s)
-                LIMIT 1
-            """, (pdf_id, field_identifier, field_identifier))
-            existing = cursor.fetchone()
-            if existing:
-                # Update existing field
-                cursor.execute("""
-                    UPDATE fields SET
-                        field_id = %s, field_name = %s, label = %s, original_name = %s,
-                        field_type = %s, value = %s, checked = %s, radio_group = %s,
-                        date_format = %s, monospace = %s,
-                        x = %s, y = %s, width = %s, height = %s, page = %s,
-                        border_style = %s, border_width = %s, border_color = %s,
-                        font_family = %s, font_size = %s, max_length = %s
-                    WHERE id = %s
-                """, (
-                    field_data.get('id'), field_data.get('name'), field_data.get('label'),
-                    field_data.get('original_name'), field_data.get('field_type'),
-                    field_data.get('value'), field_data.get('checked', False),
-                    field_data.get('radio_group'), field_data.get('date_format'),
-                    field_data.get('monospace', False),
-                    field_data.get('x'), field_data.get('y'), field_data.get('width'),
-                    field_data.get('height'), field_data.get('page'),
-                    field_data.get('border_style'), field_data.get('border_width'),
-                    json.dumps(field_data.get('border_color')) if field_data.get('border_color') else None,
-                    field_data.get('font_family'), field_data.get('font_size'),
-                    field_data.get('max_length'),
-                    existing[0]
-                ))
-            else:
-                # Insert new field
-                cursor.execute("""
-                    INSERT INTO fields (
-                        pdf_id, field_id, field_name, label, original_name, field_type, value,
-                        checked, radio_group, date_format, monospace,
-                        x, y, width, height, page,
-                        border_style, border_width, border_color,
-                        font_family, font_size, max_length
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    pdf_id, field_data.get('id'), field_data.get('name'), field_data.get('label'),
-                    field_data.get('original_name'), field_data.get('field_type'),
-                    field_data.get('value'), field_data.get('checked', False),
-                    field_data.get('radio_group'), field_data.get('date_format'),
-                    field_data.get('monospace', False),
-                    field_data.get('x'), field_data.get('y'), field_data.get('width'),
-                    field_data.get('height'), field_data.get('page'),
-                    field_data.get('border_style'), field_data.get('border_width'),
-                    json.dumps(field_data.get('border_color')) if field_data.get('border_color') else None,
-                    field_data.get('font_family'), field_data.get('font_size'),
-                    field_data.get('max_length')
-                ))
+            # Fields are keyed by (pdf_id, field_id). Without an id the field is matched by
+            # name, so resolve the stored id first - otherwise the upsert would insert a
+            # second row for an uploaded field (stored as field_{page}_{idx})
+            field_identifier = field_data.get('id')
+            if not field_identifier:
+                cursor.execute(FIELD_ID_BY_NAME_SQL, (pdf_id, field_data.get('name')))
+                row = cursor.fetchone()
+                field_identifier = row[0] if row else field_data.get('name')
+            cursor.execute(UPSERT_FIELD_SQL, _field_row(pdf_id, {**field_data, 'id': field_identifier}))
+            _refresh_field_count(cursor, pdf_id)
             conn.commit()
             return True
     except Error as e:
@@ -319,15 +449,23 @@ def db_delete_field(pdf_id: str, field_name: str) -> bool:
             cursor.execute("""
                 DELETE FROM fields WHERE pdf_id = %s AND field_name = %s
             """, (pdf_id, field_name))
+            _refresh_field_count(cursor, pdf_id)
             conn.commit()
             return True
     except Error as e:
         print(f"❌ Error deleting field: {e}")
         return False
+def _unique_ids(field_ids: List[str]) -> List[str]:
+    """Drop duplicate ids (order preserved) so IN lists only carry each id once"""
+    return list(dict.fromkeys(field_ids))
 def db_bulk_delete_fields(pdf_id: str, field_ids: List[str]) -> bool:
     """Delete multiple fields"""
+    field_ids = _unique_ids(field_ids)
+    if not field_ids:
+        return True
     try:
         with get_db_connection() as conn:
+            conn.start_transaction(isolation_level='READ COMMITTED')
             cursor = conn.cursor()
             # Use IN clause for multiple IDs
             placeholders = ', '.join(['%s'] * len(field_ids))
@@ -335,48 +473,51 @@ def db_bulk_delete_fields(pdf_id: str, field_ids: List[str]) -> bool:
                 DELETE FROM fields 
                 WHERE pdf_id = %s AND (field_id IN ({placeholders}) OR field_name IN ({placeholders}))
             """, [pdf_id] + field_ids + field_ids)
+            _refresh_field_count(cursor, pdf_id)
             conn.commit()
             return True
     except Error as e:
         print(f"❌ Error bulk deleting fields: {e}")
         return False
+# Map frontend field names to database column names for bulk updates
+BULK_UPDATE_COLUMNS = {
+    'field_type': 'field_type',
+    'value': 'value',
+    'checked': 'checked',
+    'maxLength': 'max_length',
+    'borderStyle': 'border_style',
+    'borderWidth': 'border_width',
+    'borderColor': 'border_color',
+}
 def db_bulk_update_fields(pdf_id: str, field_ids: List[str], updates: Dict[str, Any]) -> int:
     """Update multiple fields with common properties"""
+    field_ids = _unique_ids(field_ids)
+    # Drop unset properties once, up front - nothing to do if none remain
+    updates = {key: value for key, value in updates.items() if value is not None}
+    if not field_ids or not updates:
+        return 0
+    # Build dynamic UPDATE query
+    set_clauses = []
+    params = []
+    for key, value in updates.items():
+        if key in ('borderColor', 'border_color'):
+            set_clauses.append("border_color = %s")
+            params.append(orjson.dumps(value).decode())
+        else:
+            set_clauses.append(f"{BULK_UPDATE_COLUMNS.get(key, key)} = %s")
+            params.append(value)
+    # Build WHERE clause
+    placeholders = ', '.join(['%s'] * len(field_ids))
+    query = f"""
+        UPDATE fields 
+        SET {', '.join(set_clauses)}
+        WHERE pdf_id = %s AND (field_id IN ({placeholders}) OR field_name IN ({placeholders}))
+    """
+    params.extend([pdf_id] + field_ids + field_ids)
     try:
         with get_db_connection() as conn:
+            conn.start_transaction(isolation_level='READ COMMITTED')
             cursor = conn.cursor()
-            # Build dynamic UPDATE query
-            set_clauses = []
-            params = []
-            # Map frontend field names to database column names
-            field_mapping = {
-                'field_type': 'field_type',
-                'value': 'value',
-                'checked': 'checked',
-                'maxLength': 'max_length',
-                'borderStyle': 'border_style',
-                'borderWidth': 'border_width',
-                'borderColor': 'border_color',
-            }
-            for key, value in updates.items():
-                if value is not None:
-                    db_column = field_mapping.get(key, key)
-                    if key in ['borderColor', 'border_color']:
-                        set_clauses.append(f"border_color = %s")
-                        params.append(json.dumps(value))
-                    else:
-                        set_clauses.append(f"{db_column} = %s")
-                        params.append(value)
-            if not set_clauses:
-                return 0
-            # Build WHERE clause
-            placeholders = ', '.join(['%s'] * len(field_ids))
-            query = f"""
-                UPDATE fields 
-                SET {', '.join(set_clauses)}
-                WHERE pdf_id = %s AND (field_id IN ({placeholders}) OR field_name IN ({placeholders}))
-            """
-            params.extend([pdf_id] + field_ids + field_ids)
             cursor.execute(query, params)
             updated_count = cursor.rowcount
             conn.commit()
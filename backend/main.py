@@ -1,18 +1,33 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel, validator
-from typing import List, Dict, Any, Optional
+from fastapi.responses import ORJSONResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple, BinaryIO, Literal, Annotated
 import pypdf
+from pypdf.generic import (
+    ArrayObject,
+    BooleanObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    TextStringObject,
+)
 import io
-import json
-import base64
+import asyncio
 import os
+import re
 from pathlib import Path
+from collections import OrderedDict
+from functools import lru_cache
+import threading
 import uuid
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import queue
+import atexit
 import sys
+import tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -25,6 +40,8 @@ from database import (
     run_migrations,
     db_save_pdf,
     db_get_pdf,
+    db_get_pdf_meta,
+    db_get_pdf_content,
     db_list_pdfs,
     db_update_field,
     db_delete_field,
@@ -33,13 +50,37 @@ from database import (
     db_delete_pdf
 )
 
+# Import cache functions
+from cache import (
+    init_cache,
+    cache_get,
+    cache_set,
+    invalidate_pdf,
+    pdf_meta_key,
+    PDF_LIST_KEY,
+    PDF_LIST_TTL,
+    PDF_META_TTL
+)
+
+# Import object storage functions
+from storage import (
+    init_storage,
+    storage_enabled,
+    storage_put_pdf,
+    storage_delete_pdf,
+    storage_get_pdf,
+    storage_presigned_url
+)
+
 # ===================================================================================
 # LOGGING CONFIGURATION
 # ===================================================================================
 
-# Create logs directory if it doesn't exist
+# Log files are written by a single process only: RotatingFileHandler is not safe across
+# processes (one worker's rollover renames the file under the others). Multi-worker
+# deployments set LOG_TO_FILES=false and log to stdout, which journald/docker collect
+LOG_TO_FILES = os.getenv('LOG_TO_FILES', 'true').lower() in ('1', 'true', 'yes')
 LOG_DIR = Path("/var/www/html/2026/pdf-editor/backend/logs")
-LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 # Configure logging format
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s"
@@ -56,58 +97,100 @@ logger.setLevel(logging.INFO)
 console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setLevel(logging.INFO)
 console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# Rotating file handler for general application logs
-# Max size: 10MB, Keep 5 backup files
-app_log_file = LOG_DIR / "app.log"
-app_file_handler = RotatingFileHandler(
-    app_log_file,
-    maxBytes=10 * 1024 * 1024,  # 10 MB
-    backupCount=5,
-    encoding='utf-8'
-)
-app_file_handler.setLevel(logging.INFO)
-app_file_handler.setFormatter(formatter)
-logger.addHandler(app_file_handler)
-
-# Rotating file handler for error logs
-# Max size: 10MB, Keep 10 backup files
-error_log_file = LOG_DIR / "error.log"
-error_file_handler = RotatingFileHandler(
-    error_log_file,
-    maxBytes=10 * 1024 * 1024,  # 10 MB
-    backupCount=10,
-    encoding='utf-8'
-)
-error_file_handler.setLevel(logging.ERROR)
-error_file_handler.setFormatter(formatter)
-logger.addHandler(error_file_handler)
-
-# Rotating file handler for PDF processing logs
-# Max size: 20MB, Keep 5 backup files
-pdf_log_file = LOG_DIR / "pdf_processing.log"
-pdf_file_handler = RotatingFileHandler(
-    pdf_log_file,
-    maxBytes=20 * 1024 * 1024,  # 20 MB
-    backupCount=5,
-    encoding='utf-8'
-)
-pdf_file_handler.setLevel(logging.DEBUG)
-pdf_file_handler.setFormatter(formatter)
+
+app_handlers = [console_handler]
+pdf_handlers = [console_handler]
+if LOG_TO_FILES:
+    # Create logs directory if it doesn't exist
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Rotating file handler for general application logs
+    # Max size: 10MB, Keep 5 backup files
+    app_log_file = LOG_DIR / "app.log"
+    app_file_handler = RotatingFileHandler(
+        app_log_file,
+        maxBytes=10 * 1024 * 1024,  # 10 MB
+        backupCount=5,
+        encoding='utf-8'
+    )
+    app_file_handler.setLevel(logging.INFO)
+    app_file_handler.setFormatter(formatter)
+
+    # Rotating file handler for error logs
+    # Max size: 10MB, Keep 10 backup files
+    error_log_file = LOG_DIR / "error.log"
+    error_file_handler = RotatingFileHandler(
+        error_log_file,
+        maxBytes=10 * 1024 * 1024,  # 10 MB
+        backupCount=10,
+        encoding='utf-8'
+    )
+    error_file_handler.setLevel(logging.ERROR)
+    error_file_handler.setFormatter(formatter)
+
+    # Rotating file handler for PDF processing logs
+    # Max size: 20MB, Keep 5 backup files
+    pdf_log_file = LOG_DIR / "pdf_processing.log"
+    pdf_file_handler = RotatingFileHandler(
+        pdf_log_file,
+        maxBytes=20 * 1024 * 1024,  # 20 MB
+        backupCount=5,
+        encoding='utf-8'
+    )
+    pdf_file_handler.setLevel(logging.DEBUG)
+    pdf_file_handler.setFormatter(formatter)
+
+    app_handlers += [app_file_handler, error_file_handler]
+    pdf_handlers.insert(0, pdf_file_handler)
 
 # Create a separate logger for PDF processing
 pdf_logger = logging.getLogger("pdf_editor.pdf_processing")
 pdf_logger.setLevel(logging.DEBUG)
-pdf_logger.addHandler(pdf_file_handler)
-pdf_logger.addHandler(console_handler)
+
+
+def _attach_queue_listener(target: logging.Logger, *handlers: logging.Handler) -> QueueListener:
+    """
+    Route a logger through a queue so callers (including the event loop) never block on
+    stdout or file I/O; a background thread hands records to the real handlers.
+    """
+    log_queue = queue.SimpleQueue()
+    target.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+_attach_queue_listener(logger, *app_handlers)
+_attach_queue_listener(pdf_logger, *pdf_handlers)
 
 logger.info("=" * 80)
 logger.info("PDF Editor API - Logging initialized")
-logger.info(f"Log directory: {LOG_DIR}")
+logger.info(f"Log directory: {LOG_DIR}" if LOG_TO_FILES else "File logging disabled - logging to stdout only")
 logger.info("=" * 80)
 
-app = FastAPI(title="PDF Editor API", version="1.0.0")
+# orjson serializes the large field lists much faster than the stdlib encoder
+app = FastAPI(title="PDF Editor API", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Chunk size used when streaming PDF bytes back to the client
+CONTENT_CHUNK_SIZE = 64 * 1024
+
+# CR, LF and double quotes are dropped from filenames placed in Content-Disposition
+HEADER_FILENAME_UNSAFE = str.maketrans("", "", '\r\n"')
+
+# Uploads must carry the %PDF- header within their first KB (readers tolerate leading junk)
+PDF_HEADER_MAGIC = b"%PDF-"
+PDF_HEADER_SCAN_SIZE = 1024
+
+# Generated downloads above this size are spooled to disk instead of held in RAM
+DOWNLOAD_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+# Parsed PdfReaders kept per pdf_id (LRU) so repeat downloads skip re-parsing the
+# xref and page tree, and skip fetching the blob. PDF bytes never change after upload.
+# Each reader is paired with a lock: PdfReader is not thread-safe and downloads run in worker threads
+PDF_READER_CACHE_SIZE = int(os.getenv("PDF_READER_CACHE_SIZE", "8"))
+_pdf_reader_cache: "OrderedDict[str, Tuple[pypdf.PdfReader, threading.Lock]]" = OrderedDict()
+_pdf_reader_cache_lock = threading.Lock()
 
 # Configure CORS
 # Allow multiple origins for development and production
@@ -137,6 +220,8 @@ async def startup_event():
         logger.info("Database connection pool initialized")
         run_migrations()
         logger.info("Database migrations completed")
+        await init_cache()
+        init_storage()
         logger.info("Application started successfully")
     except Exception as e:
         logger.error(f"Fatal error during startup: {e}", exc_info=True)
@@ -168,23 +253,15 @@ class FieldInfo(BaseModel):
     border_width: Optional[float] = 1
     border_color: Optional[List[float]] = [0, 0, 0]  # RGB values 0-1
     max_length: Optional[int] = None  # Maximum number of characters (None = unlimited)
-    font_name: Optional[str] = "Helvetica"  # Font name: Helvetica, Times, or Courier
-    font_size: Optional[float] = 12  # Font size in points (6-72)
-    
-    @validator('font_name')
-    def validate_font_name(cls, v):
-        """Validate that font_name is one of the supported fonts"""
-        if v is not None and v not in ['Helvetica', 'Times', 'Courier']:
-            raise ValueError('font_name must be one of: Helvetica, Times, Courier')
-        return v
-    
-    @validator('font_size')
-    def validate_font_size(cls, v):
-        """Validate that font_size is within acceptable range"""
-        if v is not None:
-            if v < 6 or v > 72:
-                raise ValueError('font_size must be between 6 and 72 points')
-        return v
+    # Constrained in the schema so pydantic-core validates them without Python validators
+    font_name: Optional[Literal["Helvetica", "Times", "Courier"]] = "Helvetica"  # Font name: Helvetica, Times, or Courier
+    font_size: Optional[Annotated[float, Field(ge=6, le=72)]] = 12  # Font size in points (6-72)
+
+
+# Every FieldInfo key with its default. Extracted fields are built as plain dicts
+# from this template - their values come from our own parser, so running model
+# validation for each of them adds nothing
+FIELD_DEFAULTS = FieldInfo(name="", field_type="Text").model_dump()
 
 
 class PDFInfo(BaseModel):
@@ -241,287 +318,383 @@ def decode_pdf_string(value) -> str:
 
     # If it's bytes, decode properly
     if isinstance(value, bytes):
-        # Check for UTF-16BE BOM
+        # Sniff byte order marks: UTF-16BE (PDF 1.x), UTF-8 (PDF 2.0), and UTF-16LE
+        # which some non-conforming writers emit
         if value.startswith(b'\xfe\xff'):
-            try:
-                return value[2:].decode('utf-16-be')
-            except:
-                pass
+            return value[2:].decode('utf-16-be', errors='replace')
+        if value.startswith(b'\xef\xbb\xbf'):
+            return value[3:].decode('utf-8', errors='replace')
+        if value.startswith(b'\xff\xfe'):
+            return value[2:].decode('utf-16-le', errors='replace')
+        # Fast path: plain ASCII is valid in every encoding below
+        if value.isascii():
+            return value.decode('ascii')
         # Try UTF-8
         try:
             return value.decode('utf-8')
-        except:
-            pass
-        # Fall back to latin-1 (PDFDocEncoding is similar)
-        try:
+        except UnicodeDecodeError:
+            # Fall back to latin-1 (PDFDocEncoding is similar); maps every byte, never fails
             return value.decode('latin-1')
-        except:
-            return str(value)
 
     return str(value)
 
 
-def is_date_field(field_name: str) -> bool:
+def get_cached_reader(pdf_id: str) -> Optional[Tuple[pypdf.PdfReader, threading.Lock]]:
     """
-    Check if a field is likely a date field based on its name.
+    Return the cached (PdfReader, lock) pair for a PDF, or None if it has not been parsed yet.
     """
-    name_lower = field_name.lower()
-    # Check for common date-related keywords, but exclude "lettres" (text representation)
-    date_keywords = ['date', 'jour', 'day', 'mois', 'month', 'annee', 'année', 'year', 'naissance', 'birth']
-    exclude_keywords = ['lettres', 'letter', 'text']
+    with _pdf_reader_cache_lock:
+        entry = _pdf_reader_cache.get(pdf_id)
+        if entry is not None:
+            _pdf_reader_cache.move_to_end(pdf_id)
+        return entry
 
-    has_date_keyword = any(keyword in name_lower for keyword in date_keywords)
-    has_exclude_keyword = any(keyword in name_lower for keyword in exclude_keywords)
 
-    return has_date_keyword and not has_exclude_keyword
+def cache_reader(pdf_id: str, reader: pypdf.PdfReader) -> Tuple[pypdf.PdfReader, threading.Lock]:
+    """
+    Store a parsed PdfReader, evicting the least recently used ones past PDF_READER_CACHE_SIZE.
+    """
+    entry = (reader, threading.Lock())
+    if PDF_READER_CACHE_SIZE <= 0:
+        return entry
+    with _pdf_reader_cache_lock:
+        _pdf_reader_cache[pdf_id] = entry
+        _pdf_reader_cache.move_to_end(pdf_id)
+        while len(_pdf_reader_cache) > PDF_READER_CACHE_SIZE:
+            _pdf_reader_cache.popitem(last=False)
+    return entry
+
+
+# Appearance state names meaning "unchecked"
+OFF_STATES = frozenset(("/Off", "Off"))
+
+# Field flag bits that change how a field type is presented (PDF 1.7, 12.7.4)
+FF_MULTILINE = 1 << 12
+FF_RADIO = 1 << 15
+FF_PUSHBUTTON = 1 << 16
+# Flags that matter for each raw /FT, and (/FT, masked flags) -> editor field type.
+# Pushbutton wins over radio, as in the spec; unknown types fall back to "Text"
+FIELD_TYPE_FLAG_MASKS = {"/Btn": FF_RADIO | FF_PUSHBUTTON, "/Tx": FF_MULTILINE}
+FIELD_TYPES = {
+    ("/Btn", 0): "Checkbox",
+    ("/Btn", FF_RADIO): "Radio",
+    ("/Btn", FF_PUSHBUTTON): "Button",
+    ("/Btn", FF_RADIO | FF_PUSHBUTTON): "Button",
+    ("/Tx", 0): "Text",
+    ("/Tx", FF_MULTILINE): "Textarea",
+    ("/Ch", 0): "Choice",
+    ("/Sig", 0): "Signature",
+}
+
+# Per-upload cap on individual "Error processing annotation" warnings
+MAX_ANNOTATION_WARNINGS = 10
+
+# Date-related keywords, but exclude "lettres" (text representation)
+DATE_KEYWORDS = ['date', 'jour', 'day', 'mois', 'month', 'annee', 'année', 'year', 'naissance', 'birth']
+DATE_EXCLUDE_KEYWORDS = ['lettres', 'letter', 'text']
+# Compiled once so each field name is a single C-level scan per keyword set
+_DATE_RE = re.compile("|".join(map(re.escape, DATE_KEYWORDS)), re.IGNORECASE)
+_DATE_EXCLUDE_RE = re.compile("|".join(map(re.escape, DATE_EXCLUDE_KEYWORDS)), re.IGNORECASE)
 
 
-@app.post("/api/pdf/upload")
-async def upload_pdf(file: UploadFile = File(...)):
+def is_date_field(field_name: str) -> bool:
     """
-    Upload a PDF file and extract its fields
+    Check if a field is likely a date field based on its name.
     """
-    logger.info(f"Upload request received - Filename: {file.filename}, Content-Type: {file.content_type}")
+    return bool(_DATE_RE.search(field_name)) and not _DATE_EXCLUDE_RE.search(field_name)
 
-    if not file.filename.endswith('.pdf'):
-        logger.warning(f"Invalid file type rejected: {file.filename}")
-        raise HTTPException(status_code=400, detail="File must be a PDF")
+
+def extract_pdf_fields(stream: BinaryIO) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Parse a PDF from a seekable binary stream and extract its form fields.
+    CPU-bound and synchronous - upload_pdf runs it in a worker thread.
+    """
+    pdf_reader = pypdf.PdfReader(stream)
+    num_pages = len(pdf_reader.pages)
+    pdf_logger.info(f"PDF has {num_pages} page(s)")
+
+    # Extract fields from the PDF
+    fields = []
     
+    # Check if PDF has form fields using AcroForm
     try:
-        # Read the PDF file
-        pdf_logger.info(f"Reading PDF file: {file.filename}")
-        contents = await file.read()
-        file_size = len(contents)
-        pdf_logger.info(f"PDF size: {file_size / 1024:.2f} KB")
+        # Build a list of all field annotations with their positions
+        # This handles multiple widgets with the same field name (checkboxes/radios)
+        field_annotations = []
+        failed_annotations = 0
+        # Decoded parent attributes keyed by the parent's (idnum, generation)
+        parent_info_cache: Dict[Tuple[int, int], Tuple[str, str, int, str, str]] = {}
+
+        for page_num, page in enumerate(pdf_reader.pages):
+            page_height = float(page.mediabox.height)
 
-        pdf_reader = pypdf.PdfReader(io.BytesIO(contents))
-        num_pages = len(pdf_reader.pages)
-        pdf_logger.info(f"PDF has {num_pages} page(s)")
+            if "/Annots" in page:
+                annotations = page["/Annots"]
+                for annot_idx, annot in enumerate(annotations):
+                    try:
+                        annot_obj = annot.get_object()
 
-        # Generate a unique ID using UUID
-        pdf_id = str(uuid.uuid4())
-        logger.info(f"Generated PDF ID: {pdf_id}")
+                        # Check if it's a widget annotation (form field)
+                        if annot_obj.get("/Subtype") != "/Widget":
+                            continue
 
-        # Extract fields from the PDF
-        fields = []
-        
-        # Check if PDF has form fields using AcroForm
-        try:
-            # Build a list of all field annotations with their positions
-            # This handles multiple widgets with the same field name (checkboxes/radios)
-            field_annotations = []
-
-            for page_num, page in enumerate(pdf_reader.pages):
-                page_height = float(page.mediabox.height)
-
-                if "/Annots" in page:
-                    annotations = page["/Annots"]
-                    for annot_idx, annot in enumerate(annotations):
-                        try:
-                            annot_obj = annot.get_object()
-
-                            # Check if it's a widget annotation (form field)
-                            if annot_obj.get("/Subtype") != "/Widget":
-                                continue
-
-                            # Get field name - build full qualified name
-                            field_name = None
-                            parent_name = ""
-                            tooltip = ""
-                            field_type_raw = "/Tx"
-                            field_flags = 0
-                            field_value = ""
-                            export_value = "Yes"
-
-                            # Get info from annotation or parent
-                            if "/Parent" in annot_obj:
-                                parent = annot_obj["/Parent"].get_object()
+                        # Get field name - build full qualified name
+                        field_name = None
+                        parent_name = ""
+                        tooltip = ""
+                        field_type_raw = "/Tx"
+                        field_flags = 0
+                        field_value = ""
+                        export_value = "Yes"
+
+                        # Get info from annotation or parent
+                        # (one .get per key instead of an `in` check followed by a second lookup)
+                        if "/Parent" in annot_obj:
+                            # Widgets of one radio group / checkbox set share a parent - decode it once
+                            parent_ref = annot_obj.raw_get("/Parent")
+                            parent_key = (
+                                (parent_ref.idnum, parent_ref.generation)
+                                if isinstance(parent_ref, IndirectObject) else None
+                            )
+                            parent_info = parent_info_cache.get(parent_key) if parent_key else None
+                            if parent_info is None:
+                                parent = parent_ref.get_object()
+                                parent_get = parent.get
                                 if "/T" in parent:
                                     parent_name = decode_pdf_string(parent["/T"])
-                                if "/FT" in parent:
-                                    field_type_raw = str(parent.get("/FT", "/Tx"))
-                                if "/Ff" in parent:
+                                ft = parent_get("/FT")
+                                if ft is not None:
+                                    field_type_raw = str(ft)
+                                ff = parent_get("/Ff")
+                                if ff is not None:
                                     try:
-                                        field_flags = int(parent.get("/Ff", 0))
+                                        field_flags = int(ff)
                                     except:
                                         field_flags = 0
-                                if "/V" in parent:
-                                    field_value = decode_pdf_string(parent.get("/V", ""))
+                                v = parent_get("/V")
+                                if v is not None:
+                                    field_value = decode_pdf_string(v)
                                 if "/TU" in parent:
                                     tooltip = decode_pdf_string(parent["/TU"])
-
-                            # Get info from annotation itself (overrides parent)
-                            if "/T" in annot_obj:
-                                annot_name = decode_pdf_string(annot_obj["/T"])
-                                if parent_name:
-                                    field_name = f"{parent_name}.{annot_name}"
-                                else:
-                                    field_name = annot_name
-                            elif parent_name:
-                                field_name = parent_name
-
-                            if "/FT" in annot_obj:
-                                field_type_raw = str(annot_obj.get("/FT", field_type_raw))
-                            if "/Ff" in annot_obj:
-                                try:
-                                    field_flags = int(annot_obj.get("/Ff", field_flags))
-                                except:
-                                    pass
-                            if "/V" in annot_obj:
-                                field_value = decode_pdf_string(annot_obj.get("/V", field_value))
-                            if "/TU" in annot_obj:
-                                tooltip = decode_pdf_string(annot_obj["/TU"])
-
-                            # Get export value for buttons (AP/N keys or /AS)
-                            if "/AP" in annot_obj:
-                                ap = annot_obj["/AP"]
-                                if hasattr(ap, "get_object"):
-                                    ap = ap.get_object()
-                                if "/N" in ap:
-                                    n_dict = ap["/N"]
-                                    if hasattr(n_dict, "get_object"):
-                                        n_dict = n_dict.get_object()
-                                    if hasattr(n_dict, "keys"):
-                                        for key in n_dict.keys():
-                                            key_str = str(key)
-                                            if key_str not in ("/Off", "Off"):
-                                                export_value = decode_pdf_string(key_str.lstrip("/"))
-                                                break
+                                parent_info = (parent_name, field_type_raw, field_flags, field_value, tooltip)
+                                if parent_key:
+                                    parent_info_cache[parent_key] = parent_info
+                            parent_name, field_type_raw, field_flags, field_value, tooltip = parent_info
+
+                        # Get info from annotation itself (overrides parent)
+                        annot_get = annot_obj.get
+                        if "/T" in annot_obj:
+                            annot_name = decode_pdf_string(annot_obj["/T"])
+                            if parent_name:
+                                field_name = f"{parent_name}.{annot_name}"
+                            else:
+                                field_name = annot_name
+                        elif parent_name:
+                            field_name = parent_name
+
+                        ft = annot_get("/FT")
+                        if ft is not None:
+                            field_type_raw = str(ft)
+                        ff = annot_get("/Ff")
+                        if ff is not None:
+                            try:
+                                field_flags = int(ff)
+                            except:
+                                pass
+                        v = annot_get("/V")
+                        if v is not None:
+                            field_value = decode_pdf_string(v)
+                        if "/TU" in annot_obj:
+                            tooltip = decode_pdf_string(annot_obj["/TU"])
+
+                        # Get export value for buttons (first non-Off AP/N key, or /AS).
+                        # Only checkboxes/radios use it, so other field types skip the lookup
+                        if field_type_raw == "/Btn":
+                            try:
+                                # DictionaryObject lookups already resolve indirect references
+                                n_dict = annot_obj["/AP"]["/N"]
+                                # Keys are NameObjects (str subclass), so no str()/decode round trip
+                                export_value = next(
+                                    (key.lstrip("/") for key in n_dict if key not in OFF_STATES),
+                                    export_value
+                                )
+                            except (KeyError, TypeError):
+                                pass
                             if "/AS" in annot_obj:
-                                as_val = str(annot_obj["/AS"])
-                                if as_val not in ("/Off", "Off"):
+                                # NameObject hashes/compares as its str value, no copy needed
+                                as_val = annot_obj["/AS"]
+                                if as_val not in OFF_STATES:
                                     export_value = decode_pdf_string(as_val.lstrip("/"))
 
-                            if not field_name:
-                                continue
-
-                            # Get rectangle
-                            if "/Rect" not in annot_obj:
-                                continue
+                        if not field_name:
+                            continue
 
-                            rect = annot_obj["/Rect"]
-                            x1, y1, x2, y2 = [float(v) for v in rect]
+                        # Get rectangle
+                        if "/Rect" not in annot_obj:
+                            continue
 
+                        x1, y1, x2, y2 = map(float, annot_obj["/Rect"])
+
+                        field_annotations.append({
+                            "name": field_name,
+                            "original_name": field_name,
+                            "tooltip": tooltip,
+                            "field_type_raw": field_type_raw,
+                            "field_flags": field_flags,
+                            "field_value": field_value,
+                            "export_value": export_value,
+                            "page": page_num,
                             # Convert to top-left origin for HTML canvas
-                            width = x2 - x1
-                            height = y2 - y1
-                            x = x1
-                            y = page_height - y2
-
-                            field_annotations.append({
-                                "name": field_name,
-                                "original_name": field_name,
-                                "tooltip": tooltip,
-                                "field_type_raw": field_type_raw,
-                                "field_flags": field_flags,
-                                "field_value": field_value,
-                                "export_value": export_value,
-                                "page": page_num,
-                                "x": x,
-                                "y": y,
-                                "width": width,
-                                "height": height,
-                                "annot_idx": annot_idx
-                            })
-                        except Exception as e:
-                            print(f"Error processing annotation: {e}")
-                            continue
+                            "x": x1,
+                            "y": page_height - y2,
+                            "width": x2 - x1,
+                            "height": y2 - y1,
+                            "annot_idx": annot_idx
+                        })
+                    except Exception as e:
+                        # Malformed PDFs can fail on every widget - only log the first few
+                        failed_annotations += 1
+                        if failed_annotations <= MAX_ANNOTATION_WARNINGS:
+                            pdf_logger.warning(f"Error processing annotation {annot_idx} on page {page_num}: {e}")
+                        continue
+
+        if failed_annotations > MAX_ANNOTATION_WARNINGS:
+            pdf_logger.warning(f"Skipped {failed_annotations} unreadable annotation(s) in total")
+
+        # Process collected annotations into fields
+        for idx, annot_data in enumerate(field_annotations):
+            field_type_raw = annot_data["field_type_raw"]
+            field_flags = annot_data["field_flags"]
+
+            # Determine field type
+            field_type = FIELD_TYPES.get(
+                (field_type_raw, field_flags & FIELD_TYPE_FLAG_MASKS.get(field_type_raw, 0)),
+                "Text"
+            )
+
+            # For text fields, check height to determine if it's likely multiline
+            if field_type == "Text" and annot_data["height"] > 40:
+                field_type = "Textarea"
+
+            # Check if it's a date field based on name
+            if field_type == "Text" and is_date_field(annot_data["name"]):
+                field_type = "Date"
+
+            # Determine checked state for checkboxes/radios
+            checked = False
+            value = annot_data["field_value"]
+            export_value = annot_data["export_value"]
+
+            if field_type in ("Checkbox", "Radio"):
+                # Field is checked if current value matches export value
+                if value:
+                    value_clean = value.lstrip("/")
+                    checked = value_clean not in ("Off", "") and value_clean == export_value
+                value = export_value  # Use export value as the field value
+
+            # Generate unique ID - simple incremental to avoid duplicates
+            field_id = f"field_{annot_data['page']}_{annot_data['annot_idx']}"
+
+            # Use tooltip as label if available, otherwise use field name
+            label = annot_data["tooltip"] if annot_data["tooltip"] else annot_data["name"]
+
+            # Set default dimensions for checkbox/radio
+            width = annot_data["width"]
+            height = annot_data["height"]
+
+            field_info = dict(
+                FIELD_DEFAULTS,
+                border_color=list(FIELD_DEFAULTS["border_color"]),
+                id=field_id,
+                name=annot_data["name"],
+                label=label,
+                original_name=annot_data["original_name"],
+                field_type=field_type,
+                value=value if value else ("Yes" if field_type in ("Checkbox", "Radio") else ""),
+                checked=checked,
+                x=annot_data["x"],
+                y=annot_data["y"],
+                width=width,
+                height=height,
+                page=annot_data["page"],
+                max_length=None
+            )
+            fields.append(field_info)
+    except Exception as e:
+        pdf_logger.error(f"Error extracting fields from PDF: {e}", exc_info=True)
+        # Continue without fields if extraction fails
+
+    pdf_logger.info(f"Extracted {len(fields)} field(s) from PDF")
+
+    return num_pages, fields
 
-            # Process collected annotations into fields
-            for idx, annot_data in enumerate(field_annotations):
-                field_type_raw = annot_data["field_type_raw"]
-                field_flags = annot_data["field_flags"]
-
-                is_multiline = bool(field_flags & (1 << 12))
-                is_radio = bool(field_flags & (1 << 15))
-                is_pushbutton = bool(field_flags & (1 << 16))
-
-                # Determine field type
-                if field_type_raw == "/Btn":
-                    if is_pushbutton:
-                        field_type = "Button"
-                    elif is_radio:
-                        field_type = "Radio"
-                    else:
-                        field_type = "Checkbox"
-                elif field_type_raw == "/Tx":
-                    field_type = "Textarea" if is_multiline else "Text"
-                elif field_type_raw == "/Ch":
-                    field_type = "Choice"
-                elif field_type_raw == "/Sig":
-                    field_type = "Signature"
-                else:
-                    field_type = "Text"
-
-                # For text fields, check height to determine if it's likely multiline
-                if field_type == "Text" and annot_data["height"] > 40:
-                    field_type = "Textarea"
-
-                # Check if it's a date field based on name
-                if field_type == "Text" and is_date_field(annot_data["name"]):
-                    field_type = "Date"
-
-                # Determine checked state for checkboxes/radios
-                checked = False
-                value = annot_data["field_value"]
-                export_value = annot_data["export_value"]
-
-                if field_type in ("Checkbox", "Radio"):
-                    # Field is checked if current value matches export value
-                    if value:
-                        value_clean = value.lstrip("/")
-                        checked = value_clean not in ("Off", "") and value_clean == export_value
-                    value = export_value  # Use export value as the field value
-
-                # Generate unique ID - simple incremental to avoid duplicates
-                field_id = f"field_{annot_data['page']}_{annot_data['annot_idx']}"
-
-                # Use tooltip as label if available, otherwise use field name
-                label = annot_data["tooltip"] if annot_data["tooltip"] else annot_data["name"]
-
-                # Set default dimensions for checkbox/radio
-                width = annot_data["width"]
-                height = annot_data["height"]
-
-                field_info = FieldInfo(
-                    id=field_id,
-                    name=annot_data["name"],
-                    label=label,
-                    original_name=annot_data["original_name"],
-                    field_type=field_type,
-                    value=value if value else ("Yes" if field_type in ("Checkbox", "Radio") else ""),
-                    checked=checked,
-                    x=annot_data["x"],
-                    y=annot_data["y"],
-                    width=width,
-                    height=height,
-                    page=annot_data["page"],
-                    max_length=None
-                )
-                fields.append(field_info)
-        except Exception as e:
-            pdf_logger.error(f"Error extracting fields from PDF: {e}", exc_info=True)
-            # Continue without fields if extraction fails
-
-        pdf_logger.info(f"Extracted {len(fields)} field(s) from PDF")
+
+@app.post("/api/pdf/upload")
+async def upload_pdf(file: UploadFile = File(...)):
+    """
+    Upload a PDF file and extract its fields
+    """
+    logger.info(f"Upload request received - Filename: {file.filename}, Content-Type: {file.content_type}")
+
+    if not file.filename.endswith('.pdf'):
+        logger.warning(f"Invalid file type rejected: {file.filename}")
+        raise HTTPException(status_code=400, detail="File must be a PDF")
+
+    # Reject renamed non-PDFs from their first bytes instead of running the parser on them
+    header = await file.read(PDF_HEADER_SCAN_SIZE)
+    await file.seek(0)
+    if PDF_HEADER_MAGIC not in header:
+        logger.warning(f"Upload without a PDF header rejected: {file.filename}")
+        raise HTTPException(status_code=400, detail="File is not a valid PDF")
+    
+    try:
+        # Parse straight from the upload's spooled temp file (kept in RAM when small,
+        # on disk when large) instead of reading the whole PDF into memory first
+        pdf_logger.info(f"Reading PDF file: {file.filename}")
+        upload = file.file
+        file_size = upload.seek(0, os.SEEK_END)
+        upload.seek(0)
+        pdf_logger.info(f"PDF size: {file_size / 1024:.2f} KB")
+
+        num_pages, fields = await asyncio.to_thread(extract_pdf_fields, upload)
+        upload.seek(0)
+
+        # Generate a unique ID using UUID
+        pdf_id = str(uuid.uuid4())
+        logger.info(f"Generated PDF ID: {pdf_id}")
 
         # Save to database
-        fields_dict = [field.dict() for field in fields]
         logger.info(f"Saving PDF to database: {pdf_id}")
-        success = db_save_pdf(pdf_id, file.filename, len(pdf_reader.pages), contents, fields_dict)
+        if storage_enabled():
+            # Keep the bytes in object storage, only the key goes to MySQL
+            storage_key = await asyncio.to_thread(storage_put_pdf, pdf_id, upload)
+            logger.info(f"PDF stored in object storage: {storage_key}")
+            success = await asyncio.to_thread(db_save_pdf, pdf_id, file.filename, num_pages, None, fields, storage_key)
+            if not success:
+                # No row points at the object - don't leave it orphaned in the bucket
+                try:
+                    await asyncio.to_thread(storage_delete_pdf, storage_key)
+                except Exception as e:
+                    logger.error(f"Failed to delete orphaned object {storage_key}: {e}")
+        else:
+            # The database driver needs the blob as bytes
+            contents = await asyncio.to_thread(upload.read)
+            success = await asyncio.to_thread(db_save_pdf, pdf_id, file.filename, num_pages, contents, fields)
 
         if not success:
             logger.error(f"Failed to save PDF to database: {pdf_id}")
             raise HTTPException(status_code=500, detail="Failed to save PDF to database")
 
+        await invalidate_pdf(pdf_id)
         logger.info(f"PDF saved successfully: {pdf_id} ({file.filename}, {len(fields)} fields)")
-        return {
+        # Returned as an ORJSONResponse so the field dicts skip FastAPI's jsonable_encoder pass
+        return ORJSONResponse({
             "pdf_id": pdf_id,
             "filename": file.filename,
-            "num_pages": len(pdf_reader.pages),
-            "fields": fields_dict,
+            "num_pages": num_pages,
+            "fields": fields,
             "message": f"PDF uploaded successfully. Found {len(fields)} fields."
-        }
+        })
     
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
@@ -534,9 +707,17 @@ async def list_pdfs():
     List all uploaded PDFs
     """
     logger.info("Listing all PDFs")
-    pdfs = db_list_pdfs()
+    pdfs = await cache_get(PDF_LIST_KEY)
+    if pdfs is None:
+        pdfs = await asyncio.to_thread(db_list_pdfs)
+        if pdfs is None:
+            # Database error: answer with an empty list as before, but don't cache it
+            logger.error("Failed to list PDFs from the database")
+            pdfs = []
+        else:
+            await cache_set(PDF_LIST_KEY, pdfs, PDF_LIST_TTL)
     logger.info(f"Found {len(pdfs)} PDF(s)")
-    return {"pdfs": pdfs}
+    return ORJSONResponse({"pdfs": pdfs})
 
 
 @app.get("/api/pdf/{pdf_id}")
@@ -545,19 +726,30 @@ async def get_pdf_info(pdf_id: str):
     Get information about a specific PDF
     """
     logger.info(f"Fetching PDF info: {pdf_id}")
-    pdf_info = db_get_pdf(pdf_id)
+    # Resolved before reading the database, so a write landing meanwhile bumps the
+    # generation and this read's cache_set below can't serve stale fields
+    meta_key = await pdf_meta_key(pdf_id)
+    cached = await cache_get(meta_key)
+    if cached is not None:
+        logger.info(f"PDF info served from cache: {pdf_id}")
+        return ORJSONResponse(cached)
+
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta, pdf_id)
     if not pdf_info:
         logger.warning(f"PDF not found: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
     
     logger.info(f"PDF info retrieved: {pdf_id} ({pdf_info['filename']}, {len(pdf_info['fields'])} fields)")
     # Remove raw_data from response (too large)
-    return {
+    response = {
         "pdf_id": pdf_info["pdf_id"],
         "filename": pdf_info["filename"],
         "num_pages": pdf_info["num_pages"],
         "fields": pdf_info["fields"]
     }
+    await cache_set(meta_key, response, PDF_META_TTL)
+    # Plain dicts throughout - serialize directly instead of through jsonable_encoder
+    return ORJSONResponse(response)
 
 
 @app.post("/api/pdf/{pdf_id}/field")
@@ -567,25 +759,26 @@ async def update_field(pdf_id: str, request: UpdateFieldRequest):
     """
     logger.info(f"Updating field in PDF: {pdf_id}")
     # Check if PDF exists
-    pdf_info = db_get_pdf(pdf_id)
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta, pdf_id)
     if not pdf_info:
         logger.warning(f"PDF not found for field update: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
     
     field = request.field
-    field_dict = field.dict()
-    logger.debug(f"Field data: {field.name} (type: {field.field_type})")
+    field_dict = field.model_dump()
+    logger.debug("Field data: %s (type: %s)", field.name, field.field_type)
 
     # Update or insert field in database
-    success = db_update_field(pdf_id, field_dict)
+    success = await asyncio.to_thread(db_update_field, pdf_id, field_dict)
     if not success:
         logger.error(f"Failed to update field: {field.name} in PDF {pdf_id}")
         raise HTTPException(status_code=500, detail="Failed to update field")
 
+    await invalidate_pdf(pdf_id)
     logger.info(f"Field updated successfully: {field.name}")
     return {
         "message": "Field updated successfully",
-        "field": field
+        "field": field_dict
     }
 
 
@@ -596,16 +789,17 @@ async def delete_field(pdf_id: str, field_name: str):
     """
     logger.info(f"Deleting field: {field_name} from PDF: {pdf_id}")
     # Check if PDF exists
-    pdf_info = db_get_pdf(pdf_id)
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta, pdf_id)
     if not pdf_info:
         logger.warning(f"PDF not found for field deletion: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
     
-    success = db_delete_field(pdf_id, field_name)
+    success = await asyncio.to_thread(db_delete_field, pdf_id, field_name)
     if not success:
         logger.error(f"Failed to delete field: {field_name} from PDF {pdf_id}")
         raise HTTPException(status_code=500, detail="Failed to delete field")
 
+    await invalidate_pdf(pdf_id)
     logger.info(f"Field deleted successfully: {field_name}")
     return {"message": f"Field {field_name} deleted successfully"}
 
@@ -617,16 +811,17 @@ async def bulk_delete_fields(pdf_id: str, request: BulkDeleteRequest):
     """
     logger.info(f"Bulk deleting {len(request.field_ids)} fields from PDF: {pdf_id}")
     # Check if PDF exists
-    pdf_info = db_get_pdf(pdf_id)
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta, pdf_id)
     if not pdf_info:
         logger.warning(f"PDF not found for bulk delete: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
 
-    success = db_bulk_delete_fields(pdf_id, request.field_ids)
+    success = await asyncio.to_thread(db_bulk_delete_fields, pdf_id, request.field_ids)
     if not success:
         logger.error(f"Failed to bulk delete fields from PDF {pdf_id}")
         raise HTTPException(status_code=500, detail="Failed to delete fields")
 
+    await invalidate_pdf(pdf_id)
     logger.info(f"Bulk deleted {len(request.field_ids)} fields successfully")
     return {"message": f"Deleted {len(request.field_ids)} fields successfully"}
 
@@ -637,18 +832,19 @@ async def bulk_update_fields(pdf_id: str, request: BulkUpdateRequest):
     Update multiple fields with common properties
     """
     logger.info(f"Bulk updating {len(request.field_ids)} fields in PDF: {pdf_id}")
-    logger.debug(f"Update properties: {request.updates}")
+    logger.debug("Update properties: %s", request.updates)
     # Check if PDF exists
-    pdf_info = db_get_pdf(pdf_id)
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta, pdf_id)
     if not pdf_info:
         logger.warning(f"PDF not found for bulk update: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
 
-    updated_count = db_bulk_update_fields(pdf_id, request.field_ids, request.updates)
+    updated_count = await asyncio.to_thread(db_bulk_update_fields, pdf_id, request.field_ids, request.updates)
     if updated_count == 0:
         logger.error(f"Failed to bulk update fields in PDF {pdf_id}")
         raise HTTPException(status_code=500, detail="Failed to update fields")
 
+    await invalidate_pdf(pdf_id)
     logger.info(f"Bulk updated {updated_count} fields successfully")
     return {"message": f"Updated {updated_count} fields successfully"}
 
@@ -656,361 +852,400 @@ async def bulk_update_fields(pdf_id: str, request: BulkUpdateRequest):
 @app.get("/api/pdf/{pdf_id}/content")
 async def get_pdf_content(pdf_id: str):
     """
-    Get the raw PDF content as base64
+    Stream the raw PDF content
     """
     logger.info(f"Getting PDF content: {pdf_id}")
-    pdf_info = db_get_pdf(pdf_id)
-    if not pdf_info:
+    content = await asyncio.to_thread(db_get_pdf_content, pdf_id)
+    if not content:
         logger.warning(f"PDF not found: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF not found")
-    
-    pdf_bytes = pdf_info.get("raw_data")
-    
+
+    if content["storage_key"]:
+        # Let the client fetch the bytes straight from object storage
+        logger.info(f"Redirecting to object storage for PDF content: {pdf_id}")
+        url = await asyncio.to_thread(storage_presigned_url, content["storage_key"])
+        return RedirectResponse(url, status_code=302)
+
+    pdf_bytes = content["raw_data"]
     if not pdf_bytes:
         logger.error(f"PDF content not found: {pdf_id}")
         raise HTTPException(status_code=404, detail="PDF content not found")
-    
-    # Return base64 encoded PDF
-    pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+
     logger.info(f"PDF content retrieved: {pdf_id} ({len(pdf_bytes) / 1024:.2f} KB)")
 
-    return {
-        "pdf_id": pdf_id,
-        "content": pdf_base64,
-        "content_type": "application/pdf"
-    }
+    # Stream the raw bytes in chunks instead of base64 encoding them into JSON
+    # Chunks are cut from a memoryview; StreamingResponse only passes bytes through,
+    # so each one becomes bytes as it is sent and a single-chunk body is sent as-is
+    def iter_chunks():
+        if len(pdf_bytes) <= CONTENT_CHUNK_SIZE:
+            yield pdf_bytes
+            return
+        view = memoryview(pdf_bytes)
+        for start in range(0, len(view), CONTENT_CHUNK_SIZE):
+            yield bytes(view[start:start + CONTENT_CHUNK_SIZE])
+
+    return StreamingResponse(
+        iter_chunks(),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": "inline",
+            "Content-Length": str(len(pdf_bytes))
+        }
+    )
 
 
-@app.get("/api/pdf/{pdf_id}/download")
-async def download_pdf(pdf_id: str):
+# Standard Type1 fonts declared in the AcroForm /DR: (resource name, /BaseFont, field font_name)
+PDF_STANDARD_FONTS = (
+    ("/Helv", "/Helvetica", "Helvetica"),
+    ("/Times", "/Times-Roman", "Times"),
+    ("/Cour", "/Courier", "Courier"),
+)
+
+# Map font names to PDF resource names
+FONT_RESOURCE_NAMES = {font_name: resource_name for resource_name, _, font_name in PDF_STANDARD_FONTS}
+
+# AcroForm default appearance - immutable string object, safe to share between writers
+ACROFORM_DEFAULT_DA = TextStringObject("/Helv 12 Tf 0 g")
+
+# Interned keys and constant values for the per-field widget loop. All are immutable
+# str/int subclasses, so unlike dictionaries they are safe to share between documents
+KEY_FT, KEY_FF, KEY_V, KEY_DV, KEY_AS, KEY_AP, KEY_N, KEY_DA, KEY_DR, KEY_Q, KEY_MAXLEN = map(
+    NameObject, ("/FT", "/Ff", "/V", "/DV", "/AS", "/AP", "/N", "/DA", "/DR", "/Q", "/MaxLen")
+)
+NAME_TX, NAME_BTN, NAME_SIG, NAME_OFF = map(NameObject, ("/Tx", "/Btn", "/Sig", "/Off"))
+NAME_NULL = NameObject("null")
+KEY_TYPE, KEY_SUBTYPE, KEY_T, KEY_TU, KEY_RECT, KEY_F, KEY_MK, KEY_BC, KEY_BG, KEY_BS, KEY_W, KEY_S = map(
+    NameObject, ("/Type", "/Subtype", "/T", "/TU", "/Rect", "/F", "/MK", "/BC", "/BG", "/BS", "/W", "/S")
+)
+NAME_ANNOT, NAME_WIDGET = map(NameObject, ("/Annot", "/Widget"))
+PDF_ONE = NumberObject(1)
+PRINT_FLAGS = NumberObject(4)  # Bit 3 = Print
+EMPTY_TEXT = TextStringObject("")
+PDF_ZERO = NumberObject(0)
+MULTILINE_FLAGS = NumberObject(1 << 12)  # Bit 13 = Multiline
+RADIO_FLAGS = NumberObject(1 << 15)  # Bit 16 = Radio
+COMB_FLAGS = NumberObject(1 << 24)  # Bit 25 = Comb (requires MaxLen)
+
+@lru_cache(maxsize=64)
+def default_appearance(font_name: str, font_size: float) -> TextStringObject:
     """
-    Download the PDF with fillable form fields
+    Build the /DA string for a font and size. Most fields share a handful of
+    combinations, so the immutable TextStringObject is cached and reused.
     """
-    logger.info(f"Download request for PDF: {pdf_id}")
-    pdf_info = db_get_pdf(pdf_id)
-    if not pdf_info:
-        logger.warning(f"PDF not found for download: {pdf_id}")
-        raise HTTPException(status_code=404, detail="PDF not found")
+    pdf_font_name = FONT_RESOURCE_NAMES.get(font_name, "/Helv")
+    return TextStringObject(f"{pdf_font_name} {font_size} Tf 0 g")
 
-    pdf_bytes = pdf_info.get("raw_data")
 
-    if not pdf_bytes:
-        logger.error(f"PDF content not found for download: {pdf_id}")
-        raise HTTPException(status_code=404, detail="PDF content not found")
+@lru_cache(maxsize=64)
+def max_length_number(max_length: int) -> NumberObject:
+    """
+    /MaxLen value for a field. Templates repeat the same few lengths,
+    so the immutable NumberObject is cached and reused.
+    """
+    return NumberObject(max_length)
 
-    try:
-        pdf_logger.info(f"Starting PDF generation for download: {pdf_id}")
-        from pypdf.generic import (
-            DictionaryObject,
-            ArrayObject,
-            NameObject,
-            NumberObject,
-            TextStringObject,
-            BooleanObject,
-        )
 
-        # Read the original PDF
-        pdf_logger.debug(f"Reading original PDF: {pdf_id}")
-        pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
-        pdf_writer = pypdf.PdfWriter()
+# Map border style to PDF border style (hoisted out of the per-field loop)
+PDF_BORDER_STYLES = {
+    "solid": NameObject("/S"),
+    "dashed": NameObject("/D"),
+    "beveled": NameObject("/B"),
+    "inset": NameObject("/I"),
+    "underline": NameObject("/U"),
+    "none": NameObject("/S")  # Will use width 0
+}
 
-        # Clone all pages from original PDF, but remove existing form field annotations
-        for page in pdf_reader.pages:
-            # Remove existing widget annotations (form fields) from the page
-            if "/Annots" in page:
-                new_annots = ArrayObject()
-                for annot in page["/Annots"]:
-                    try:
-                        annot_obj = annot.get_object()
-                        # Keep non-widget annotations (links, comments, etc.)
-                        if annot_obj.get("/Subtype") != "/Widget":
-                            new_annots.append(annot)
-                    except:
-                        pass
-                if len(new_annots) > 0:
-                    page[NameObject("/Annots")] = new_annots
-                else:
-                    # Remove empty Annots array
-                    del page["/Annots"]
-            pdf_writer.add_page(page)
-
-        # Remove existing AcroForm from the document if present
-        if "/AcroForm" in pdf_writer._root_object:
-            del pdf_writer._root_object["/AcroForm"]
-
-        # Get fields from storage grouped by page
-        fields = pdf_info.get("fields", [])
-        fields_by_page = {}
-        for field in fields:
-            page_num = field.get("page", 0)
-            if page_num not in fields_by_page:
-                fields_by_page[page_num] = []
-            fields_by_page[page_num].append(field)
-
-        # Create AcroForm dictionary for the PDF
-        acro_form = DictionaryObject()
-        field_refs = ArrayObject()
-
-        # Create standard PDF fonts as indirect objects
-        # This is required for compatibility with third-party PDF libraries like SetaPDF
-        
-        # Helvetica font
-        helvetica_font = DictionaryObject({
-            NameObject("/Type"): NameObject("/Font"),
-            NameObject("/Subtype"): NameObject("/Type1"),
-            NameObject("/BaseFont"): NameObject("/Helvetica"),
-            NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
-        })
-        helvetica_font_ref = pdf_writer._add_object(helvetica_font)
-        
-        # Times-Roman font
-        times_font = DictionaryObject({
-            NameObject("/Type"): NameObject("/Font"),
-            NameObject("/Subtype"): NameObject("/Type1"),
-            NameObject("/BaseFont"): NameObject("/Times-Roman"),
-            NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
-        })
-        times_font_ref = pdf_writer._add_object(times_font)
-        
-        # Courier font
-        courier_font = DictionaryObject({
+
+def build_fillable_pdf(pdf_reader: pypdf.PdfReader, fields: List[Dict[str, Any]]) -> BinaryIO:
+    """
+    Rebuild the original PDF with fresh AcroForm fields and return it as a file rewound to the start.
+    CPU-bound and synchronous - download_pdf runs it in a worker thread.
+    """
+    pdf_writer = pypdf.PdfWriter()
+
+    # Clone all pages from original PDF, but remove existing form field annotations
+    # (stripping is idempotent, so it is safe on an already-stripped cached reader)
+    for page in pdf_reader.pages:
+        # Remove existing widget annotations (form fields) from the page
+        if "/Annots" in page:
+            new_annots = ArrayObject()
+            for annot in page["/Annots"]:
+                try:
+                    annot_obj = annot.get_object()
+                    # Keep non-widget annotations (links, comments, etc.)
+                    if annot_obj.get("/Subtype") != "/Widget":
+                        new_annots.append(annot)
+                except:
+                    pass
+            if len(new_annots) > 0:
+                page[NameObject("/Annots")] = new_annots
+            else:
+                # Remove empty Annots array
+                del page["/Annots"]
+        pdf_writer.add_page(page)
+
+    # Remove existing AcroForm from the document if present
+    if "/AcroForm" in pdf_writer._root_object:
+        del pdf_writer._root_object["/AcroForm"]
+
+    # Get fields from storage grouped by page
+    fields_by_page = {}
+    for field in fields:
+        fields_by_page.setdefault(field.get("page", 0), []).append(field)
+
+    # Create AcroForm dictionary for the PDF
+    acro_form = DictionaryObject()
+    field_refs = ArrayObject()
+
+    # Create standard PDF fonts as indirect objects, gathered in one indirect Font dictionary
+    # This is required for compatibility with third-party PDF libraries like SetaPDF
+    # Built per writer (not shared at module level): _add_object binds each dictionary to this document
+    font_dict = DictionaryObject({
+        NameObject(resource_name): pdf_writer._add_object(DictionaryObject({
             NameObject("/Type"): NameObject("/Font"),
             NameObject("/Subtype"): NameObject("/Type1"),
-            NameObject("/BaseFont"): NameObject("/Courier"),
+            NameObject("/BaseFont"): NameObject(base_font),
             NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
-        })
-        courier_font_ref = pdf_writer._add_object(courier_font)
-        
-        # Map font names to references
-        font_refs_map = {
-            "Helvetica": helvetica_font_ref,
-            "Times": times_font_ref,
-            "Courier": courier_font_ref,
-        }
-        
-        # Map font names to PDF resource names
-        font_name_map = {
-            "Helvetica": "/Helv",
-            "Times": "/Times",
-            "Courier": "/Cour",
-        }
-        
-        # Create the Font dictionary as an indirect object with all available fonts
-        # This is created early so it can be referenced by individual field widgets
-        font_dict = DictionaryObject({
-            NameObject("/Helv"): helvetica_font_ref,
-            NameObject("/Times"): times_font_ref,
-            NameObject("/Cour"): courier_font_ref,
-        })
-        font_dict_ref = pdf_writer._add_object(font_dict)
-
-        # Create the DR (Default Resources) dictionary with proper indirect references
-        # This is created early so it can be referenced by individual field widgets
-        dr_dict = DictionaryObject({
-            NameObject("/Font"): font_dict_ref
-        })
-        dr_dict_ref = pdf_writer._add_object(dr_dict)
-
-        # Process each page and add form fields
-        for page_num in range(len(pdf_writer.pages)):
-            if page_num not in fields_by_page:
-                continue
+        }))
+        for resource_name, base_font, _ in PDF_STANDARD_FONTS
+    })
+    font_dict_ref = pdf_writer._add_object(font_dict)
+
+    # Create the DR (Default Resources) dictionary with proper indirect references
+    # This is created early so it can be referenced by individual field widgets
+    dr_dict = DictionaryObject({
+        NameObject("/Font"): font_dict_ref
+    })
+    dr_dict_ref = pdf_writer._add_object(dr_dict)
+
+    # On-state names by export value: most checkboxes share a handful ("Yes", "On", ...)
+    on_states = {}
+
+    # Process each page and add form fields
+    for page_num in range(len(pdf_writer.pages)):
+        if page_num not in fields_by_page:
+            continue
+
+        page = pdf_writer.pages[page_num]
+        page_height = float(page.mediabox.height)
+
+        # Initialize annotations array if not present, and resolve it once for the page
+        if "/Annots" not in page:
+            page[NameObject("/Annots")] = ArrayObject()
+        page_annots = page["/Annots"]
+
+        for field in fields_by_page[page_num]:
+            field_name = field.get("name", "field")
+            field_label = field.get("label", field_name)
+            field_value = field.get("value", "")
+            field_type = field.get("field_type", "Text")
+            x = float(field.get("x", 0))
+            y = float(field.get("y", 0))
+            width = float(field.get("width", 150))
+            height = float(field.get("height", 30))
+            border_style = field.get("border_style", "solid")
+            border_width = float(field.get("border_width", 1))
+            border_color = field.get("border_color", [0, 0, 0])  # RGB values 0-1
+            max_length = field.get("max_length", None)
+            font_name = field.get("font_name", "Helvetica")  # Get font name from field
+            font_size = float(field.get("font_size", 12))  # Get font size from field
+
+            # Convert from top-left origin (HTML) to bottom-left origin (PDF)
+            pdf_y = page_height - y - height
+
+            # Map border style to PDF border style
+            pdf_border_style = PDF_BORDER_STYLES.get(border_style, PDF_BORDER_STYLES["solid"])
+
+            # If border is "none", set width to 0
+            if border_style == "none":
+                border_width = 0
+
+            # Default appearance string with selected font and size (shared per font/size)
+            da = default_appearance(font_name, font_size)
+
+            # Create the field widget annotation with the common field properties,
+            # then add the type-specific entries in a single update
+            field_dict = DictionaryObject({
+                KEY_TYPE: NAME_ANNOT,
+                KEY_SUBTYPE: NAME_WIDGET,
+                KEY_T: TextStringObject(field_name),  # Field name
+                KEY_TU: TextStringObject(field_label),  # Tooltip (shows label)
+                KEY_RECT: ArrayObject([
+                    NumberObject(int(x)),
+                    NumberObject(int(pdf_y)),
+                    NumberObject(int(x + width)),
+                    NumberObject(int(pdf_y + height))
+                ]),
+                KEY_F: PRINT_FLAGS,  # Print flag
+                KEY_MK: DictionaryObject({
+                    KEY_BC: ArrayObject([NumberObject(bc) for bc in border_color]),  # Border color
+                    KEY_BG: ArrayObject([PDF_ONE, PDF_ONE, PDF_ONE]),  # Background (white)
+                }),
+                KEY_BS: DictionaryObject({
+                    KEY_W: NumberObject(int(border_width)),  # Border width
+                    KEY_S: pdf_border_style,  # Border style
+                }),
+            })
+
+            if field_type == "Signature":
+                # Signature field
+                field_dict.update({
+                    KEY_FT: NAME_SIG,  # Signature field
+                    KEY_FF: PDF_ZERO,  # Field flags
+                })
+            elif field_type in ("Checkbox", "Radio"):
+                # Checkbox / radio button field
+                checked = field.get("checked", False)
+                export_value = field.get("value", "Yes")
+                on_state = on_states.get(export_value)
+                if on_state is None:
+                    on_state = on_states[export_value] = NameObject(f"/{export_value}")
+                state = on_state if checked else NAME_OFF
+                field_dict.update({
+                    KEY_FT: NAME_BTN,  # Button field
+                    # Radio flag (bit 16) - checkboxes are neither pushbutton nor radio
+                    KEY_FF: RADIO_FLAGS if field_type == "Radio" else PDF_ZERO,
+                    KEY_V: state,
+                    KEY_DV: state,
+                    KEY_AS: state,
+                    KEY_AP: DictionaryObject({
+                        KEY_N: DictionaryObject({
+                            on_state: NAME_NULL,
+                            NAME_OFF: NAME_NULL,
+                        })
+                    }),
+                })
+            elif field_type == "Textarea":
+                # Multiline text field
+                text_value = TextStringObject(field_value) if field_value else EMPTY_TEXT
+                field_dict.update({
+                    KEY_FT: NAME_TX,  # Text field
+                    KEY_V: text_value,
+                    KEY_DV: text_value,
+                    KEY_FF: MULTILINE_FLAGS,  # Bit 13 = Multiline flag
+                    KEY_DA: da,  # Default appearance with font
+                    KEY_DR: dr_dict_ref,  # Add font resources to field for SetaPDF compatibility
+                    KEY_Q: PDF_ZERO,  # Left alignment
+                })
+                if max_length:
+                    field_dict[KEY_MAXLEN] = max_length_number(int(max_length))
+            else:
+                # Single-line text field (default) - includes Text and Date
+                monospace = field.get("monospace", False)
+
+                # Comb flag only applies together with MaxLen
+                field_flags = COMB_FLAGS if monospace and max_length else PDF_ZERO
+
+                text_value = TextStringObject(field_value) if field_value else EMPTY_TEXT
+                field_dict.update({
+                    KEY_FT: NAME_TX,  # Text field
+                    KEY_V: text_value,
+                    KEY_DV: text_value,
+                    KEY_FF: field_flags,
+                    KEY_DA: da,  # Default appearance with font
+                    KEY_DR: dr_dict_ref,  # Add font resources to field for SetaPDF compatibility
+                    KEY_Q: PDF_ZERO,  # Left alignment
+                })
+                if max_length and max_length > 0:
+                    field_dict[KEY_MAXLEN] = max_length_number(int(max_length))
+
+            # Add field as indirect object and add to page annotations
+            field_ref = pdf_writer._add_object(field_dict)
+            page_annots.append(field_ref)
+            field_refs.append(field_ref)
+
+    # Set up AcroForm in the document catalog
+    acro_form.update({
+        NameObject("/Fields"): field_refs,
+        NameObject("/NeedAppearances"): BooleanObject(True),
+        NameObject("/DA"): ACROFORM_DEFAULT_DA,  # Default font
+        NameObject("/DR"): dr_dict_ref  # Use indirect reference instead of direct dictionary
+    })
+
+    # Add AcroForm to the root object as a direct dictionary
+    # Note: AcroForm itself must be direct, not indirect, for SetaPDF compatibility
+    # The resources inside (DR, fonts) are indirect, which is correct
+    pdf_writer._root_object[NameObject("/AcroForm")] = acro_form
+
+
+    # Write the modified PDF to a spooled file (RAM when small, disk past DOWNLOAD_SPOOL_MAX_SIZE)
+    output_file = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_MAX_SIZE)
+    pdf_writer.write(output_file)
+    output_file.seek(0)
+    return output_file
+
+
+def render_download(pdf_id: str, cached: Optional[Tuple[pypdf.PdfReader, threading.Lock]],
+                    pdf_bytes: Optional[bytes], fields: List[Dict[str, Any]]) -> BinaryIO:
+    """
+    Parse the PDF unless its reader is cached, then build the download under the reader's lock.
+    """
+    if cached is None:
+        pdf_logger.debug(f"Reading original PDF: {pdf_id}")
+        cached = cache_reader(pdf_id, pypdf.PdfReader(io.BytesIO(pdf_bytes)))
+    else:
+        pdf_logger.debug(f"Using cached PDF reader: {pdf_id}")
+    pdf_reader, reader_lock = cached
+    with reader_lock:
+        return build_fillable_pdf(pdf_reader, fields)
 
-            page = pdf_writer.pages[page_num]
-            page_height = float(page.mediabox.height)
 
-            # Initialize annotations array if not present
-            if "/Annots" not in page:
-                page[NameObject("/Annots")] = ArrayObject()
-
-            for field in fields_by_page[page_num]:
-                field_name = field.get("name", "field")
-                field_label = field.get("label", field_name)
-                field_value = field.get("value", "")
-                field_type = field.get("field_type", "Text")
-                x = float(field.get("x", 0))
-                y = float(field.get("y", 0))
-                width = float(field.get("width", 150))
-                height = float(field.get("height", 30))
-                border_style = field.get("border_style", "solid")
-                border_width = float(field.get("border_width", 1))
-                border_color = field.get("border_color", [0, 0, 0])  # RGB values 0-1
-                max_length = field.get("max_length", None)
-                font_name = field.get("font_name", "Helvetica")  # Get font name from field
-                font_size = float(field.get("font_size", 12))  # Get font size from field
-
-                # Convert from top-left origin (HTML) to bottom-left origin (PDF)
-                pdf_y = page_height - y - height
-
-                # Map border style to PDF border style
-                border_style_map = {
-                    "solid": "/S",
-                    "dashed": "/D",
-                    "beveled": "/B",
-                    "inset": "/I",
-                    "underline": "/U",
-                    "none": "/S"  # Will use width 0
-                }
-                pdf_border_style = border_style_map.get(border_style, "/S")
-
-                # If border is "none", set width to 0
-                if border_style == "none":
-                    border_width = 0
-
-                # Build default appearance string with selected font and size
-                pdf_font_name = font_name_map.get(font_name, "/Helv")
-                da_string = f"{pdf_font_name} {font_size} Tf 0 g"
-
-                # Create the field widget annotation
-                field_dict = DictionaryObject()
-
-                # Common field properties
-                common_props = {
-                    NameObject("/Type"): NameObject("/Annot"),
-                    NameObject("/Subtype"): NameObject("/Widget"),
-                    NameObject("/T"): TextStringObject(field_name),  # Field name
-                    NameObject("/TU"): TextStringObject(field_label),  # Tooltip (shows label)
-                    NameObject("/Rect"): ArrayObject([
-                        NumberObject(int(x)),
-                        NumberObject(int(pdf_y)),
-                        NumberObject(int(x + width)),
-                        NumberObject(int(pdf_y + height))
-                    ]),
-                    NameObject("/F"): NumberObject(4),  # Print flag
-                    NameObject("/MK"): DictionaryObject({
-                        NameObject("/BC"): ArrayObject([NumberObject(bc) for bc in border_color]),  # Border color
-                        NameObject("/BG"): ArrayObject([NumberObject(1), NumberObject(1), NumberObject(1)]),  # Background (white)
-                    }),
-                    NameObject("/BS"): DictionaryObject({
-                        NameObject("/W"): NumberObject(int(border_width)),  # Border width
-                        NameObject("/S"): NameObject(pdf_border_style),  # Border style
-                    }),
-                }
-
-                if field_type == "Signature":
-                    # Signature field
-                    field_dict.update(common_props)
-                    field_dict.update({
-                        NameObject("/FT"): NameObject("/Sig"),  # Signature field
-                        NameObject("/Ff"): NumberObject(0),  # Field flags
-                    })
-                elif field_type == "Checkbox":
-                    # Checkbox field
-                    field_dict.update(common_props)
-                    checked = field.get("checked", False)
-                    export_value = field.get("value", "Yes")
-                    field_dict.update({
-                        NameObject("/FT"): NameObject("/Btn"),  # Button field
-                        NameObject("/Ff"): NumberObject(0),  # Not pushbutton, not radio
-                        NameObject("/V"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/DV"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/AS"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/AP"): DictionaryObject({
-                            NameObject("/N"): DictionaryObject({
-                                NameObject(f"/{export_value}"): NameObject("null"),
-                                NameObject("/Off"): NameObject("null"),
-                            })
-                        }),
-                    })
-                elif field_type == "Radio":
-                    # Radio button field
-                    field_dict.update(common_props)
-                    checked = field.get("checked", False)
-                    export_value = field.get("value", "Yes")
-                    field_dict.update({
-                        NameObject("/FT"): NameObject("/Btn"),  # Button field
-                        NameObject("/Ff"): NumberObject(1 << 15),  # Radio flag (bit 16)
-                        NameObject("/V"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/DV"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/AS"): NameObject(f"/{export_value}") if checked else NameObject("/Off"),
-                        NameObject("/AP"): DictionaryObject({
-                            NameObject("/N"): DictionaryObject({
-                                NameObject(f"/{export_value}"): NameObject("null"),
-                                NameObject("/Off"): NameObject("null"),
-                            })
-                        }),
-                    })
-                elif field_type == "Textarea":
-                    # Multiline text field
-                    field_dict.update(common_props)
-                    field_flags = (1 << 12)  # Bit 13 = Multiline flag
-                    text_props = {
-                        NameObject("/FT"): NameObject("/Tx"),  # Text field
-                        NameObject("/V"): TextStringObject(field_value) if field_value else TextStringObject(""),
-                        NameObject("/DV"): TextStringObject(field_value) if field_value else TextStringObject(""),
-                        NameObject("/Ff"): NumberObject(field_flags),  # Multiline flag
-                        NameObject("/DA"): TextStringObject(da_string),  # Default appearance with font
-                        NameObject("/DR"): dr_dict_ref,  # Add font resources to field for SetaPDF compatibility
-                        NameObject("/Q"): NumberObject(0),  # Left alignment
-                    }
-                    if max_length:
-                        text_props[NameObject("/MaxLen")] = NumberObject(int(max_length))
-                    field_dict.update(text_props)
-                else:
-                    # Single-line text field (default) - includes Text and Date
-                    field_dict.update(common_props)
-                    monospace = field.get("monospace", False)
-
-                    # Build field flags
-                    field_flags = 0
-                    if monospace and max_length:
-                        field_flags |= (1 << 24)  # Bit 25 = Comb flag (requires MaxLen)
-
-                    text_props = {
-                        NameObject("/FT"): NameObject("/Tx"),  # Text field
-                        NameObject("/V"): TextStringObject(field_value) if field_value else TextStringObject(""),
-                        NameObject("/DV"): TextStringObject(field_value) if field_value else TextStringObject(""),
-                        NameObject("/Ff"): NumberObject(field_flags),
-                        NameObject("/DA"): TextStringObject(da_string),  # Default appearance with font
-                        NameObject("/DR"): dr_dict_ref,  # Add font resources to field for SetaPDF compatibility
-                        NameObject("/Q"): NumberObject(0),  # Left alignment
-                    }
-                    if max_length and max_length > 0:
-                        text_props[NameObject("/MaxLen")] = NumberObject(int(max_length))
-                    field_dict.update(text_props)
-
-                # Add field as indirect object and add to page annotations
-                field_ref = pdf_writer._add_object(field_dict)
-                page["/Annots"].append(field_ref)
-                field_refs.append(field_ref)
-
-        # Set up AcroForm in the document catalog
-        acro_form.update({
-            NameObject("/Fields"): field_refs,
-            NameObject("/NeedAppearances"): BooleanObject(True),
-            NameObject("/DA"): TextStringObject("/Helv 12 Tf 0 g"),  # Default font
-            NameObject("/DR"): dr_dict_ref  # Use indirect reference instead of direct dictionary
-        })
+@app.get("/api/pdf/{pdf_id}/download")
+async def download_pdf(pdf_id: str):
+    """
+    Download the PDF with fillable form fields
+    """
+    logger.info(f"Download request for PDF: {pdf_id}")
+    # With a cached reader only the fields are needed, not the raw bytes
+    cached_reader = get_cached_reader(pdf_id)
+    pdf_info = await asyncio.to_thread(db_get_pdf_meta if cached_reader is not None else db_get_pdf, pdf_id)
+    if not pdf_info:
+        logger.warning(f"PDF not found for download: {pdf_id}")
+        raise HTTPException(status_code=404, detail="PDF not found")
 
-        # Add AcroForm to the root object as a direct dictionary
-        # Note: AcroForm itself must be direct, not indirect, for SetaPDF compatibility
-        # The resources inside (DR, fonts) are indirect, which is correct
-        pdf_writer._root_object[NameObject("/AcroForm")] = acro_form
+    pdf_bytes = None
+    if cached_reader is None:
+        pdf_bytes = pdf_info.get("raw_data")
+        if not pdf_bytes and pdf_info.get("storage_key"):
+            try:
+                pdf_bytes = await asyncio.to_thread(storage_get_pdf, pdf_info["storage_key"])
+            except Exception as e:
+                logger.error(f"Error reading PDF from object storage: {e}", exc_info=True)
+                raise HTTPException(status_code=502, detail="Error reading PDF from object storage")
 
+        if not pdf_bytes:
+            logger.error(f"PDF content not found for download: {pdf_id}")
+            raise HTTPException(status_code=404, detail="PDF content not found")
 
-        # Write the modified PDF to bytes
-        output_buffer = io.BytesIO()
-        pdf_writer.write(output_buffer)
-        output_buffer.seek(0)
-        pdf_data = output_buffer.read()
+    try:
+        pdf_logger.info(f"Starting PDF generation for download: {pdf_id}")
+        pdf_file = await asyncio.to_thread(
+            render_download, pdf_id, cached_reader, pdf_bytes, pdf_info.get("fields", [])
+        )
+        file_size = pdf_file.seek(0, os.SEEK_END)
+        pdf_file.seek(0)
 
         # Return as downloadable file
-        filename = pdf_info.get("filename", "document.pdf")
-        # Add "_edited" to filename
-        if filename.endswith('.pdf'):
-            filename = filename[:-4] + "_edited.pdf"
-        else:
-            filename = filename + "_edited.pdf"
+        # Add "_edited" to filename, stripping characters that could break out of the header
+        filename = pdf_info.get("filename", "document.pdf").translate(HEADER_FILENAME_UNSAFE)
+        filename = f"{filename.removesuffix('.pdf')}_edited.pdf"
 
-        pdf_logger.info(f"PDF generated successfully: {pdf_id} ({len(pdf_data) / 1024:.2f} KB)")
+        pdf_logger.info(f"PDF generated successfully: {pdf_id} ({file_size / 1024:.2f} KB)")
         logger.info(f"Sending download: {filename}")
 
-        return Response(
-            content=pdf_data,
+        def iter_file():
+            # Sync generator: Starlette runs it in the threadpool, and the spool is
+            # closed (deleting any on-disk part) once the last chunk is sent
+            with pdf_file:
+                yield from iter(lambda: pdf_file.read(CONTENT_CHUNK_SIZE), b"")
+
+        return StreamingResponse(
+            iter_file(),
             media_type="application/pdf",
+            # Content-Type comes from media_type
             headers={
                 "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Type": "application/pdf"
+                "Content-Length": str(file_size)
             }
         )
 
@@ -1021,4 +1256,7 @@ async def download_pdf(pdf_id: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop and httptools come with uvicorn[standard]; pin them explicitly so a missing
+    # extra fails loudly instead of silently falling back to asyncio + h11.
+    # The import string lets WEB_CONCURRENCY (read by uvicorn) start several workers
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
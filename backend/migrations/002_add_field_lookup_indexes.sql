@@ -0,0 +1,6 @@
+-- Composite indexes for per-PDF field lookups
+-- Created: 2026-10-14
+-- Description: Field updates and bulk operations filter on pdf_id AND (field_id IN ... OR field_name IN ...)
+-- Both branches of the OR get a pdf_id-prefixed index so MySQL can use index_merge union instead of scanning every field of the PDF
+-- The (pdf_id, field_id) branch is served by the uq_fields_pdf_field_id unique key added in 003
+CREATE INDEX idx_fields_pdf_lookup ON fields (pdf_id, field_name, field_id);
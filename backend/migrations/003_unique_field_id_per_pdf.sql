@@ -0,0 +1,18 @@
+-- Unique field identifier per PDF
+-- Created: 2026-10-14
+-- Description: Makes (pdf_id, field_id) unique so field saves can use INSERT ... ON DUPLICATE KEY UPDATE
+-- Fields saved without an id were matched by name, so the name becomes their id
+UPDATE fields SET field_id = field_name WHERE field_id IS NULL;
+-- Never drop rows to resolve conflicts: every row sharing an identifier is kept (downloads
+-- already render each of them). The most recent one keeps the id, older ones move to a
+-- unique id suffixed with their row id. DISTINCT materializes the derived table, so MySQL
+-- reads the duplicates before updating fields
+UPDATE fields f
+JOIN (
+    SELECT DISTINCT older.id
+    FROM fields older
+    JOIN fields newer ON older.pdf_id = newer.pdf_id AND older.field_id = newer.field_id AND older.id < newer.id
+) duplicate ON duplicate.id = f.id
+SET f.field_id = CONCAT(f.field_id, '~', f.id);
+-- Also serves the field_id branch of the per-PDF lookups (see 002)
+ALTER TABLE fields ADD UNIQUE KEY uq_fields_pdf_field_id (pdf_id, field_id);
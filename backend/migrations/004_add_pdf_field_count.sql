@@ -0,0 +1,6 @@
+-- Precomputed field count per PDF
+-- Created: 2026-10-14
+-- Description: Adds pdfs.num_fields so listing PDFs no longer joins and groups the fields table
+-- The count is kept up to date by the application whenever fields are added or removed
+ALTER TABLE pdfs ADD COLUMN num_fields INT NOT NULL DEFAULT 0 COMMENT 'Number of fields' AFTER num_pages;
+UPDATE pdfs p SET num_fields = (SELECT COUNT(*) FROM fields f WHERE f.pdf_id = p.id);
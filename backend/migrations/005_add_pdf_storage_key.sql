@@ -0,0 +1,7 @@
+-- Object storage for PDF bytes
+-- Created: 2026-10-14
+-- Description: PDFs uploaded while S3_BUCKET is configured keep their bytes in S3/MinIO
+-- Only the object key is stored and raw_data stays NULL. Existing rows keep their blob
+ALTER TABLE pdfs
+    MODIFY raw_data LONGBLOB NULL COMMENT 'PDF binary data (NULL when stored in object storage)',
+    ADD COLUMN storage_key VARCHAR(255) NULL COMMENT 'Object storage key for the PDF bytes' AFTER raw_data;
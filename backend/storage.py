@@ -0,0 +1,55 @@
+"""
+Object storage module for PDF Editor
+Optional S3-compatible (AWS S3, MinIO) storage for raw PDF bytes
+When S3_BUCKET is not set, PDFs stay in the pdfs.raw_data column
+"""
+import os
+import logging
+from typing import Optional, BinaryIO
+import boto3
+from botocore.config import Config
+logger = logging.getLogger("pdf_editor.storage")
+# Storage configuration from environment variables
+S3_BUCKET = os.getenv('S3_BUCKET', '')
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None  # Set for MinIO / non-AWS endpoints
+S3_REGION = os.getenv('S3_REGION') or None
+S3_KEY_PREFIX = os.getenv('S3_KEY_PREFIX', 'pdfs/')
+S3_PRESIGN_TTL = int(os.getenv('S3_PRESIGN_TTL', '300'))
+# S3 client (None when object storage is disabled)
+s3_client = None
+def init_storage():
+    """Create the S3 client if S3_BUCKET is configured"""
+    global s3_client
+    if not S3_BUCKET:
+        logger.info("S3_BUCKET not set - PDFs are stored in the database")
+        return False
+    s3_client = boto3.client(
+        's3',
+        endpoint_url=S3_ENDPOINT_URL,
+        region_name=S3_REGION,
+        config=Config(signature_version='s3v4'),
+    )
+    logger.info(f"Object storage enabled: bucket={S3_BUCKET}")
+    return True
+def storage_enabled() -> bool:
+    """Whether new uploads go to object storage"""
+    return s3_client is not None
+def storage_put_pdf(pdf_id: str, stream: BinaryIO) -> str:
+    """Upload a PDF from a binary stream (multipart for large files) and return the object key"""
+    key = f"{S3_KEY_PREFIX}{pdf_id}.pdf"
+    s3_client.upload_fileobj(stream, S3_BUCKET, key, ExtraArgs={'ContentType': 'application/pdf'})
+    return key
+def storage_delete_pdf(key: str):
+    """Delete the object stored under key"""
+    s3_client.delete_object(Bucket=S3_BUCKET, Key=key)
+def storage_get_pdf(key: str) -> Optional[bytes]:
+    """Download PDF bytes for an object key"""
+    response = s3_client.get_object(Bucket=S3_BUCKET, Key=key)
+    return response['Body'].read()
+def storage_presigned_url(key: str) -> str:
+    """Short-lived URL the client can fetch the PDF from directly"""
+    return s3_client.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': S3_BUCKET, 'Key': key, 'ResponseContentType': 'application/pdf'},
+        ExpiresIn=S3_PRESIGN_TTL,
+    )
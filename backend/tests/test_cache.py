@@ -0,0 +1,123 @@
+"""
+Cache unit tests
+Redis is replaced by an in-memory fake, so no server is needed
+"""
+import asyncio
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import cache
+class FakePipeline:
+    """Queues commands like redis.asyncio's Pipeline and applies them on execute()"""
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+    def incr(self, key):
+        self.commands.append((self.client.incr, key))
+        return self
+    def expire(self, key, ttl):
+        self.commands.append((self.client.expire, key, ttl))
+        return self
+    def delete(self, *keys):
+        self.commands.append((self.client.delete, *keys))
+        return self
+    async def execute(self):
+        return [await command(*args) for command, *args in self.commands]
+class FakeRedis:
+    """The subset of redis.asyncio.Redis used by cache.py, storing bytes like the real client"""
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+    async def ping(self):
+        return True
+    async def get(self, key):
+        return self.data.get(key)
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+    async def incr(self, key):
+        value = int(self.data.get(key, b'0')) + 1
+        self.data[key] = str(value).encode()
+        return value
+    async def expire(self, key, ttl):
+        self.ttls[key] = ttl
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.ttls.pop(key, None)
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+class UnreachableRedis(FakeRedis):
+    closed = False
+    async def ping(self):
+        raise cache.redis.ConnectionError("Connection refused")
+    async def aclose(self):
+        self.closed = True
+@pytest.fixture
+def fake_redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache, 'redis_client', client)
+    return client
+def test_invalidate_moves_pdf_to_a_new_meta_key(fake_redis):
+    async def scenario():
+        old_key = await cache.pdf_meta_key('pdf-1')
+        await cache.cache_set(old_key, {'filename': 'old.pdf'}, cache.PDF_META_TTL)
+        await cache.invalidate_pdf('pdf-1')
+        new_key = await cache.pdf_meta_key('pdf-1')
+        return old_key, new_key, await cache.cache_get(new_key)
+    old_key, new_key, cached = asyncio.run(scenario())
+    assert old_key == 'pdf:meta:pdf-1:0'
+    assert new_key == 'pdf:meta:pdf-1:1'
+    assert cached is None
+    assert fake_redis.ttls[cache.pdf_generation_key('pdf-1')] == cache.PDF_GENERATION_TTL
+def test_read_racing_a_write_is_not_served(fake_redis):
+    async def scenario():
+        # A reader picks its key, a write lands, then the reader caches what it loaded before the write
+        reader_key = await cache.pdf_meta_key('pdf-1')
+        await cache.invalidate_pdf('pdf-1')
+        await cache.cache_set(reader_key, {'filename': 'stale.pdf'}, cache.PDF_META_TTL)
+        return await cache.cache_get(await cache.pdf_meta_key('pdf-1'))
+    assert asyncio.run(scenario()) is None
+def test_invalidate_drops_the_pdf_list(fake_redis):
+    async def scenario():
+        await cache.cache_set(cache.PDF_LIST_KEY, [{'id': 'pdf-1'}], cache.PDF_LIST_TTL)
+        await cache.invalidate_pdf('pdf-1')
+        return await cache.cache_get(cache.PDF_LIST_KEY)
+    assert asyncio.run(scenario()) is None
+def test_generations_are_per_pdf(fake_redis):
+    async def scenario():
+        await cache.invalidate_pdf('pdf-1')
+        return await cache.pdf_meta_key('pdf-2')
+    assert asyncio.run(scenario()) == 'pdf:meta:pdf-2:0'
+def test_disabled_cache_misses_and_ignores_writes(monkeypatch):
+    monkeypatch.setattr(cache, 'redis_client', None)
+    async def scenario():
+        await cache.cache_set('key', {'a': 1}, 60)
+        await cache.invalidate_pdf('pdf-1')
+        return await cache.cache_get('key'), await cache.pdf_meta_key('pdf-1')
+    assert asyncio.run(scenario()) == (None, 'pdf:meta:pdf-1:0')
+def test_init_cache_stays_disabled_when_redis_is_unreachable(monkeypatch):
+    client = UnreachableRedis()
+    from_url_kwargs = {}
+    def from_url(url, **kwargs):
+        from_url_kwargs.update(kwargs)
+        return client
+    monkeypatch.setattr(cache, 'REDIS_URL', 'redis://redis:6379/0')
+    monkeypatch.setattr(cache, 'redis_client', None)
+    monkeypatch.setattr(cache.redis, 'from_url', from_url)
+    assert asyncio.run(cache.init_cache()) is False
+    assert cache.redis_client is None
+    assert client.closed
+    assert from_url_kwargs['socket_connect_timeout'] == cache.REDIS_CONNECT_TIMEOUT
+def test_init_cache_enables_cache_after_ping(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(cache, 'REDIS_URL', 'redis://redis:6379/0')
+    monkeypatch.setattr(cache, 'redis_client', None)
+    monkeypatch.setattr(cache.redis, 'from_url', lambda url, **kwargs: client)
+    assert asyncio.run(cache.init_cache()) is True
+    assert cache.redis_client is client
@@ -0,0 +1,40 @@
+"""
+Database integration tests
+Run against a disposable MySQL/MariaDB configured through the usual DB_* variables
+Skipped when no server is reachable
+"""
+import sys
+import uuid
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
+# An uploaded field as stored by db_save_pdf (ids come from extract_pdf_fields)
+UPLOADED_FIELD = {
+    'id': 'field_0_0', 'name': 'full_name', 'field_type': 'Text', 'value': '',
+    'x': 10, 'y': 20, 'width': 150, 'height': 30, 'page': 0,
+}
+@pytest.fixture(scope="module")
+def db():
+    try:
+        database.init_connection_pool()
+        database.run_migrations()
+    except database.Error as e:
+        pytest.skip(f"MySQL not available: {e}")
+@pytest.fixture
+def pdf_id(db):
+    pdf_id = str(uuid.uuid4())
+    assert database.db_save_pdf(pdf_id, 'form.pdf', 1, b'%PDF-1.4', [UPLOADED_FIELD])
+    yield pdf_id
+    database.db_delete_pdf(pdf_id)
+def test_update_field_by_name_updates_existing_row(pdf_id):
+    saved = {key: value for key, value in UPLOADED_FIELD.items() if key != 'id'}
+    assert database.db_update_field(pdf_id, {**saved, 'value': 'Jane Doe'})
+    fields = database.db_get_pdf_meta(pdf_id)['fields']
+    assert len(fields) == 1
+    assert fields[0]['id'] == 'field_0_0'
+    assert fields[0]['value'] == 'Jane Doe'
+def test_update_field_with_new_name_inserts_row(pdf_id):
+    assert database.db_update_field(pdf_id, {**UPLOADED_FIELD, 'id': None, 'name': 'signature'})
+    fields = database.db_get_pdf_meta(pdf_id)['fields']
+    assert [field['id'] for field in fields] == ['field_0_0', 'signature']
@@ -0,0 +1,101 @@
+"""
+Endpoint unit tests
+The database and S3 functions are replaced with in-memory fakes, so no server is needed
+"""
+import asyncio
+import hashlib
+import io
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('LOG_TO_FILES', 'false')
+import pypdf
+from fastapi import HTTPException, UploadFile
+import main
+import storage
+# Download of DOWNLOAD_FIELDS over a blank two-page PDF, as produced before the
+# download path was optimised (pypdf 3.17.1) - it must stay byte-for-byte the same
+DOWNLOAD_SHA256 = "b3fed8667998071160edbbdd2b41085b323406a6f24f4d4240136e9013a27320"
+DOWNLOAD_SIZE = 2923
+def blank_pdf(num_pages: int = 1) -> bytes:
+    writer = pypdf.PdfWriter()
+    for _ in range(num_pages):
+        writer.add_blank_page(612, 792)
+    stream = io.BytesIO()
+    writer.write(stream)
+    return stream.getvalue()
+def stored_field(i: int, field_type: str, **overrides):
+    """A field as db_get_pdf returns it"""
+    field = {
+        'id': f'field_{i}', 'name': f'field_{i}', 'label': f'Field {i}', 'field_type': field_type,
+        'value': '', 'checked': False, 'x': 50.0, 'y': 60.0 + 40 * i, 'width': 150.0, 'height': 24.0,
+        'page': i % 2, 'border_style': 'solid', 'border_width': 1.0, 'border_color': [0, 0, 0],
+        'font_name': 'Helvetica', 'font_size': 12.0, 'max_length': None, 'monospace': False,
+    }
+    field.update(overrides)
+    return field
+DOWNLOAD_FIELDS = [
+    stored_field(0, 'Text', value='Jane Doe'),
+    stored_field(1, 'Textarea', value='line', height=60.0, font_name='Times'),
+    stored_field(2, 'Checkbox', value='Yes', checked=True),
+    stored_field(3, 'Radio', value='A', border_style='dashed'),
+    stored_field(4, 'Date', value='01/02/2026', max_length=10, monospace=True, font_name='Courier'),
+    stored_field(5, 'Signature', border_style='underline'),
+]
+async def read_body(response) -> bytes:
+    body = b""
+    async for chunk in response.body_iterator:
+        body += chunk
+    return body
+@pytest.fixture
+def stored_pdf(monkeypatch):
+    """A PDF row served by a fake db_get_pdf, with an empty parsed-reader cache"""
+    row = {'pdf_id': 'pdf-1', 'filename': 'form.pdf', 'raw_data': blank_pdf(2), 'fields': DOWNLOAD_FIELDS}
+    monkeypatch.setattr(main, 'db_get_pdf', lambda pdf_id: row)
+    monkeypatch.setattr(main, 'db_get_pdf_meta', lambda pdf_id: row)
+    monkeypatch.setattr(main, '_pdf_reader_cache', main.OrderedDict())
+    return row
+def upload(data: bytes, filename: str = 'form.pdf'):
+    return asyncio.run(main.upload_pdf(UploadFile(io.BytesIO(data), filename=filename)))
+def test_upload_without_pdf_header_is_rejected(monkeypatch):
+    save = mock.Mock()
+    monkeypatch.setattr(main, 'db_save_pdf', save)
+    with pytest.raises(HTTPException) as exc_info:
+        upload(b'PK\x03\x04 a zip renamed to .pdf')
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "File is not a valid PDF"
+    save.assert_not_called()
+def test_upload_saves_pdf_with_header(monkeypatch):
+    save = mock.Mock(return_value=True)
+    monkeypatch.setattr(main, 'db_save_pdf', save)
+    monkeypatch.setattr(storage, 's3_client', None)
+    response = upload(blank_pdf())
+    assert response.status_code == 200
+    _, filename, num_pages, contents, fields = save.call_args.args
+    assert (filename, num_pages, fields) == ('form.pdf', 1, [])
+    assert contents.startswith(main.PDF_HEADER_MAGIC)
+def test_failed_save_deletes_uploaded_object(monkeypatch):
+    s3_client = mock.Mock()
+    monkeypatch.setattr(storage, 's3_client', s3_client)
+    monkeypatch.setattr(main, 'db_save_pdf', mock.Mock(return_value=False))
+    with pytest.raises(HTTPException) as exc_info:
+        upload(blank_pdf())
+    assert exc_info.value.status_code == 500
+    _, bucket, key = s3_client.upload_fileobj.call_args.args
+    s3_client.delete_object.assert_called_once_with(Bucket=bucket, Key=key)
+def test_download_is_byte_identical(stored_pdf):
+    body = asyncio.run(read_body(asyncio.run(main.download_pdf('pdf-1'))))
+    assert len(body) == DOWNLOAD_SIZE
+    assert hashlib.sha256(body).hexdigest() == DOWNLOAD_SHA256
+def test_download_from_cached_reader_is_byte_identical(stored_pdf):
+    first = asyncio.run(read_body(asyncio.run(main.download_pdf('pdf-1'))))
+    assert main.get_cached_reader('pdf-1') is not None
+    second = asyncio.run(read_body(asyncio.run(main.download_pdf('pdf-1'))))
+    assert second == first
+def test_download_filename_cannot_break_out_of_header(stored_pdf):
+    stored_pdf['filename'] = 'in"voice\r\nSet-Cookie: a=b.pdf'
+    response = asyncio.run(main.download_pdf('pdf-1'))
+    assert response.headers['content-disposition'] == 'attachment; filename="invoiceSet-Cookie: a=b_edited.pdf"'
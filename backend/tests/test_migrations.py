@@ -0,0 +1,75 @@
+"""
+Migration integration tests
+Each test applies the migration files to a scratch database on the MySQL/MariaDB server
+configured through the usual DB_* variables (the user needs CREATE/DROP DATABASE)
+Skipped when no server is reachable
+"""
+import sys
+import uuid
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import mysql.connector
+from mysql.connector import Error
+import database
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+@pytest.fixture
+def scratch_db():
+    config = {key: value for key, value in database.DB_CONFIG.items() if key != 'database'}
+    try:
+        conn = mysql.connector.connect(**config)
+    except Error as e:
+        pytest.skip(f"MySQL not available: {e}")
+    name = f"pdf_editor_test_{uuid.uuid4().hex[:12]}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE DATABASE {name}")
+    except Error as e:
+        conn.close()
+        pytest.skip(f"Cannot create a scratch database: {e}")
+    conn.database = name
+    yield conn
+    cursor = conn.cursor()
+    cursor.execute(f"DROP DATABASE {name}")
+    conn.close()
+def apply_migration(conn, filename: str):
+    """Run one migration file the way _apply_pending_migrations does"""
+    cursor = conn.cursor()
+    for result in cursor.execute((MIGRATIONS_DIR / filename).read_text(), multi=True):
+        if result.with_rows:
+            result.fetchall()
+    conn.commit()
+def test_unique_field_id_migration_keeps_duplicate_rows(scratch_db):
+    apply_migration(scratch_db, '001_initial_schema.sql')
+    apply_migration(scratch_db, '002_add_field_lookup_indexes.sql')
+    cursor = scratch_db.cursor()
+    cursor.execute("INSERT INTO pdfs (id, filename, num_pages, raw_data) VALUES ('p1', 'form.pdf', 1, '%PDF')")
+    # (field_id, field_name, value): an uploaded field, a name-only save of it, a name-only
+    # save colliding with another field's id, and the same id saved twice
+    seeded = [
+        ('field_0_0', 'full_name', 'uploaded'),
+        (None, 'full_name', 'name saved by name'),
+        ('email', 'contact', 'uploaded email'),
+        (None, 'email', 'email saved by name'),
+        ('field_1_0', 'city', 'first save'),
+        ('field_1_0', 'city', 'second save'),
+    ]
+    cursor.executemany(
+        "INSERT INTO fields (pdf_id, field_id, field_name, value) VALUES ('p1', %s, %s, %s)", seeded
+    )
+    scratch_db.commit()
+    apply_migration(scratch_db, '003_unique_field_id_per_pdf.sql')
+    cursor.execute("SELECT id, field_id, field_name, value FROM fields ORDER BY id")
+    rows = cursor.fetchall()
+    # Nothing is deleted and every value survives
+    assert [row[3] for row in rows] == [value for _, _, value in seeded]
+    # The most recent row keeps a shared id, older ones move to a unique id
+    ids = {row[3]: row[1] for row in rows}
+    row_ids = {row[3]: row[0] for row in rows}
+    assert ids['uploaded'] == 'field_0_0'
+    assert ids['name saved by name'] == 'full_name'
+    assert ids['uploaded email'] == f"email~{row_ids['uploaded email']}"
+    assert ids['email saved by name'] == 'email'
+    assert ids['first save'] == f"field_1_0~{row_ids['first save']}"
+    assert ids['second save'] == 'field_1_0'
+    assert len({row[1] for row in rows}) == len(rows)
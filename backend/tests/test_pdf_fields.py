@@ -0,0 +1,68 @@
+"""
+Field extraction unit tests
+PDFs are built in memory with pypdf, no database is needed
+"""
+import io
+import os
+import sys
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('LOG_TO_FILES', 'false')
+import pypdf
+from pypdf.generic import ArrayObject, DictionaryObject, FloatObject, NameObject, NumberObject, TextStringObject
+import main
+def build_pdf(widgets) -> io.BytesIO:
+    """One-page PDF with a widget annotation per (name, /FT, /Ff) entry"""
+    writer = pypdf.PdfWriter()
+    page = writer.add_blank_page(612, 792)
+    annots = ArrayObject()
+    for idx, (name, field_type, flags) in enumerate(widgets):
+        annots.append(writer._add_object(DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Widget"),
+            NameObject("/T"): TextStringObject(name),
+            NameObject("/FT"): NameObject(field_type),
+            NameObject("/Ff"): NumberObject(flags),
+            NameObject("/Rect"): ArrayObject([FloatObject(50), FloatObject(700 - 40 * idx),
+                                              FloatObject(200), FloatObject(724 - 40 * idx)]),
+        })))
+    page[NameObject("/Annots")] = annots
+    stream = io.BytesIO()
+    writer.write(stream)
+    stream.seek(0)
+    return stream
+@pytest.mark.parametrize("raw, expected", [
+    (b'\xfe\xff\x00J\x00o\x00s\x00\xe9', 'José'),
+    (b'\xef\xbb\xbfJos\xc3\xa9', 'José'),
+    (b'\xff\xfeJ\x00o\x00s\x00\xe9\x00', 'José'),
+    (b'plain ascii', 'plain ascii'),
+    (b'Jos\xc3\xa9', 'José'),
+    (b'Jos\xe9', 'José'),
+    ('already decoded', 'already decoded'),
+    (None, ''),
+])
+def test_decode_pdf_string(raw, expected):
+    assert main.decode_pdf_string(raw) == expected
+@pytest.mark.parametrize("field_type, flags, expected", [
+    ("/Tx", 0, "Text"),
+    ("/Tx", main.FF_MULTILINE, "Textarea"),
+    # Flag bits that don't select a presentation (here ReadOnly) are ignored
+    ("/Tx", 1, "Text"),
+    ("/Btn", 0, "Checkbox"),
+    ("/Btn", main.FF_RADIO, "Radio"),
+    ("/Btn", main.FF_PUSHBUTTON, "Button"),
+    ("/Btn", main.FF_RADIO | main.FF_PUSHBUTTON, "Button"),
+    ("/Ch", 0, "Choice"),
+    ("/Sig", 0, "Signature"),
+    ("/Unknown", 0, "Text"),
+])
+def test_field_type_from_ft_and_flags(field_type, flags, expected):
+    num_pages, fields = main.extract_pdf_fields(build_pdf([("field", field_type, flags)]))
+    assert num_pages == 1
+    assert [field['field_type'] for field in fields] == [expected]
+def test_text_field_named_like_a_date_is_a_date():
+    _, fields = main.extract_pdf_fields(build_pdf([("date_naissance", "/Tx", 0), ("nom", "/Tx", 0)]))
+    assert [(field['name'], field['field_type']) for field in fields] == [
+        ("date_naissance", "Date"), ("nom", "Text"),
+    ]
@@ -0,0 +1,80 @@
+"""
+Prepared statement cache unit tests
+The MySQL connection is replaced by a fake, so no server is needed
+"""
+import gc
+import sys
+import weakref
+from pathlib import Path
+import pytest
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
+SQL = "SELECT id FROM pdfs WHERE id = ?"
+class FakeCursor:
+    def __init__(self, connection):
+        # Like mysql.connector's cursors, only a weak proxy to the connection
+        self.connection = weakref.proxy(connection)
+        self.column_names = ('id',)
+        self.executions = 0
+    def execute(self, sql, params):
+        self.executions += 1
+        if self.connection.failures:
+            self.connection.failures -= 1
+            raise database.Error("Unknown prepared statement handler")
+    def fetchall(self):
+        return [('pdf-1',)]
+class FakeConnection:
+    """Counts prepared cursors and reconnects; the next `failures` executions raise"""
+    def __init__(self, failures=0, connected=True):
+        self.connection_id = 1
+        self.failures = failures
+        self.connected = connected
+        self.cursors = []
+        self.reconnects = 0
+    def cursor(self, prepared=False):
+        assert prepared
+        cursor = FakeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+    def is_connected(self):
+        return self.connected
+    def reconnect(self):
+        self.reconnects += 1
+        self.connection_id += 1
+        self.connected = True
+def test_statement_is_prepared_once_per_connection():
+    conn = FakeConnection()
+    for _ in range(3):
+        assert database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',)) == (('id',), [('pdf-1',)])
+    assert len(conn.cursors) == 1
+    assert conn.cursors[0].executions == 3
+def test_new_server_connection_gets_new_statements():
+    conn = FakeConnection()
+    database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',))
+    conn.connection_id += 1
+    database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',))
+    assert len(conn.cursors) == 2
+def test_lost_connection_is_reconnected_and_retried():
+    conn = FakeConnection(failures=1, connected=False)
+    assert database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',)) == (('id',), [('pdf-1',)])
+    assert conn.reconnects == 1
+    assert len(conn.cursors) == 2
+def test_stale_statement_is_retried_on_a_fresh_cursor():
+    conn = FakeConnection(failures=1)
+    assert database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',)) == (('id',), [('pdf-1',)])
+    assert conn.reconnects == 0
+    assert len(conn.cursors) == 2
+def test_second_failure_is_raised():
+    conn = FakeConnection(failures=2)
+    with pytest.raises(database.Error):
+        database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',))
+    # The failed cursors are not reused by the next request
+    database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',))
+    assert len(conn.cursors) == 3
+def test_cached_cursors_go_away_with_the_connection():
+    conn = FakeConnection()
+    database._fetch_prepared(conn, 'get_pdf', SQL, ('pdf-1',))
+    assert conn in database._prepared_cursors
+    del conn
+    gc.collect()
+    assert len(database._prepared_cursors) == 0
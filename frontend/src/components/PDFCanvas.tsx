@@ -52,7 +52,7 @@ interface PageLoadSuccess {
 
 function PDFCanvas({ pdfId, fields, onFieldsUpdate }: PDFCanvasProps) {
   const { t } = useTranslation();
-  const [pdfData, setPdfData] = useState<string | null>(null);
+  const [pdfData, setPdfData] = useState<Blob | null>(null);
   const [numPages, setNumPages] = useState<number | null>(null);
   const [currentPage, setCurrentPage] = useState<number>(1);
   const [scale, setScale] = useState<number>(1.0);
@@ -68,8 +68,8 @@ function PDFCanvas({ pdfId, fields, onFieldsUpdate }: PDFCanvasProps) {
 
   const loadPDFContent = useCallback(async () => {
     try {
-      const response = await axios.get(`${API_URL}/api/pdf/${pdfId}/content`);
-      setPdfData(`data:application/pdf;base64,${response.data.content}`);
+      const response = await axios.get<Blob>(`${API_URL}/api/pdf/${pdfId}/content`, { responseType: 'blob' });
+      setPdfData(response.data);
     } catch (error) {
       console.error('Error loading PDF:', error);
     }
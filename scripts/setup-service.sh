@@ -7,9 +7,14 @@ set -e
 # Configuration
 DEPLOY_PATH="${DEPLOY_PATH:-/home/pdfmerger/pdf-editor}"
 SERVICE_NAME="pdfmerger"
+# uvicorn worker processes (state lives in MySQL/Redis/S3, so workers are independent)
+WORKERS="${WORKERS:-4}"
+# MySQL connections per worker - the service opens up to WORKERS x DB_POOL_SIZE in total
+DB_POOL_SIZE="${DB_POOL_SIZE:-8}"
 
 echo "=== PDF Editor Backend Service Setup ==="
 echo "Deployment path: $DEPLOY_PATH"
+echo "Workers: $WORKERS x $DB_POOL_SIZE MySQL connections"
 echo ""
 
 # Check if running as root
@@ -41,7 +46,10 @@ After=network.target
 Type=simple
 WorkingDirectory=$DEPLOY_PATH/backend
 Environment="PATH=$DEPLOY_PATH/backend/venv/bin"
-ExecStart=$DEPLOY_PATH/backend/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000
+# Several workers must not share rotating log files - log to the journal instead
+Environment="LOG_TO_FILES=false"
+Environment="DB_POOL_SIZE=$DB_POOL_SIZE"
+ExecStart=$DEPLOY_PATH/backend/venv/bin/uvicorn main:app --host 0.0.0.0 --port 8000 --workers $WORKERS
 Restart=always
 RestartSec=3
 